@@ -0,0 +1,139 @@
+"""Synthetic fixtures for the benchmark suite.
+
+Everything is generated locally: PDFs with text and links, EPUBs with chapters and
+images, and Markdown notes. URLs point at ``base_url`` so link titles can be served
+by a local HTTP stand-in instead of the internet.
+"""
+
+import io
+import os
+import random
+from pathlib import Path
+
+import fitz
+from ebooklib import epub
+from PIL import Image
+
+WORDS = (
+    "lecture gradient descent network layer memory latency throughput quantization kernel tensor "
+    "compiler schedule cache bandwidth accuracy model training inference dataset benchmark"
+).split()
+
+
+def _paragraph(rng: random.Random, words: int = 60) -> str:
+    return " ".join(rng.choice(WORDS) for _ in range(words)).capitalize() + "."
+
+
+def make_pdf(path: str, pages: int, base_url: str = "http://127.0.0.1:8000", seed: int = 0) -> str:
+    """Create a PDF with a title, body text, a URL in the text and a link annotation on every page.
+
+    Args:
+        path: Output PDF path.
+        pages: Number of pages.
+        base_url: Base of the URLs written into the pages.
+        seed: Random seed for the body text.
+
+    Returns:
+        The output path.
+    """
+    rng = random.Random(seed)
+    doc = fitz.open()
+    for i in range(pages):
+        page = doc.new_page()
+        url = f"{base_url}/page/{seed}/{i % 50}"
+        text = f"SECTION {i + 1}\n\n{_paragraph(rng)}\n\nSee {url} for details.\n"
+        page.insert_textbox(fitz.Rect(72, 72, 540, 720), text, fontsize=11)
+        page.insert_link({"kind": fitz.LINK_URI, "from": fitz.Rect(72, 700, 300, 720), "uri": url})
+        # A filled shape so rendered slides aren't blank
+        page.draw_rect(fitz.Rect(400, 600, 540, 700), color=(0, 0, 1), fill=(0.7, 0.8, 1))
+
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    doc.save(path)
+    doc.close()
+    return path
+
+
+def _png(rng: random.Random, size: int = 128) -> bytes:
+    image = Image.new("RGB", (size, size), tuple(rng.randrange(256) for _ in range(3)))
+    buffer = io.BytesIO()
+    image.save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def make_epub(path: str, chapters: int, images_per_chapter: int = 1, seed: int = 0) -> str:
+    """Create an EPUB with the given number of chapters, each with paragraphs, a list and images.
+
+    Args:
+        path: Output EPUB path.
+        chapters: Number of chapters.
+        images_per_chapter: Number of PNG images referenced from each chapter.
+        seed: Random seed for the chapter text and image colours.
+
+    Returns:
+        The output path.
+    """
+    rng = random.Random(seed)
+    book = epub.EpubBook()
+    book.set_identifier(f"studytool-bench-{seed}-{chapters}")
+    book.set_title(f"Benchmark Book {chapters}")
+    book.set_language("en")
+
+    items = []
+    for i in range(chapters):
+        images = []
+        for j in range(images_per_chapter):
+            name = f"images/ch{i:04d}_{j}.png"
+            book.add_item(epub.EpubItem(uid=f"img{i}_{j}", file_name=name, media_type="image/png", content=_png(rng)))
+            images.append(f'<img src="{name}" alt="figure {j}"/>')
+
+        body = "".join(f"<h2>Part {k}</h2><p>{_paragraph(rng)}</p>" for k in range(3))
+        body += "<ul>" + "".join(f"<li>{rng.choice(WORDS)}</li>" for _ in range(5)) + "</ul>"
+        chapter = epub.EpubHtml(title=f"Chapter {i + 1}", file_name=f"chap_{i:04d}.xhtml", lang="en")
+        chapter.content = f"<h1>Chapter {i + 1}</h1>{body}{''.join(images)}"
+        book.add_item(chapter)
+        items.append(chapter)
+
+    book.toc = items
+    book.spine = ["nav"] + items
+    book.add_item(epub.EpubNcx())
+    book.add_item(epub.EpubNav())
+
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    epub.write_epub(path, book)
+    return path
+
+
+def make_notes(path: str, sections: int, seed: int = 0) -> str:
+    """Create a Markdown note with Traditional Chinese text, image numbers and the imgpath pattern.
+
+    Args:
+        path: Output Markdown path.
+        sections: Number of sections.
+        seed: Random seed for the note text.
+
+    Returns:
+        The output path.
+    """
+    rng = random.Random(seed)
+    lines = [f"# {Path(path).stem}", ""]
+    for i in range(sections):
+        lines += [f"## 第{i + 1}節 記憶體與網路", "", _paragraph(rng), "", "這是一個繁體中文測試段落。", ""]
+        lines += [f"{(i % 999) + 1:02d}", ""] if i % 2 else ["、", ""]
+
+    Path(path).parent.mkdir(parents=True, exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        f.write("\n".join(lines))
+    return path
+
+
+def media_bytes(name: str, size: int) -> bytes:
+    """Deterministic pseudo-random bytes standing in for a media file called ``name``."""
+    return random.Random(name).randbytes(size)
+
+
+def make_course(folder: str, decks: int, pages: int, base_url: str = "http://127.0.0.1:8000") -> str:
+    """Create a course folder with ``decks`` slide PDFs of ``pages`` pages each under ``slides/``."""
+    slides = os.path.join(folder, "slides")
+    for i in range(decks):
+        make_pdf(os.path.join(slides, f"lec{i + 1:02d}.pdf"), pages, base_url=base_url, seed=i)
+    return folder
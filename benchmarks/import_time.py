@@ -0,0 +1,81 @@
+"""Import-time benchmark for the `stt` CLI.
+
+Runs `python -X importtime -c "import studytool.main"` in fresh interpreters and fails
+if the CLI module takes longer than the budget to import or if any heavy backend
+dependency is loaded before a command actually needs it.
+
+    python benchmarks/import_time.py --budget-ms 150 --runs 5
+"""
+
+import argparse
+import subprocess
+import sys
+
+HEAVY_MODULES = [
+    "fitz",
+    "pymupdf",
+    "pdf2image",
+    "PyPDF2",
+    "ebooklib",
+    "bs4",
+    "requests",
+    "opencc",
+    "youtube_dl",
+    "yt_dlp",
+]
+
+
+def import_times(module: str = "studytool.main") -> dict:
+    """Import ``module`` in a fresh interpreter and return cumulative import time in microseconds per module.
+
+    Args:
+        module: Dotted module name to import.
+
+    Returns:
+        Mapping of module name to cumulative import time (us).
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"], capture_output=True, text=True, check=True
+    )
+    times = {}
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "[us]" in line:
+            continue
+        _, cumulative, name = line[len("import time:") :].split("|")
+        times[name.strip()] = int(cumulative)
+    return times
+
+
+def main() -> int:
+    """Run the benchmark and return a process exit code."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="studytool.main", help="Module to import")
+    parser.add_argument("--budget-ms", type=float, default=150.0, help="Maximum cumulative import time in ms")
+    parser.add_argument("--runs", type=int, default=5, help="Number of fresh interpreters; the fastest run is used")
+    args = parser.parse_args()
+
+    runs = [import_times(args.module) for _ in range(args.runs)]
+    best = min(runs, key=lambda times: times.get(args.module, 0))
+    elapsed_ms = best.get(args.module, 0) / 1000
+
+    failed = False
+    print(f"{args.module}: {elapsed_ms:.1f} ms (budget {args.budget_ms:.0f} ms, best of {args.runs})")
+    if elapsed_ms > args.budget_ms:
+        print(f"FAIL: import time over budget by {elapsed_ms - args.budget_ms:.1f} ms")
+        failed = True
+
+    loaded = [name for name in HEAVY_MODULES if name in best]
+    if loaded:
+        print(f"FAIL: heavy modules imported eagerly: {', '.join(loaded)}")
+        failed = True
+
+    slowest = sorted(best.items(), key=lambda item: item[1], reverse=True)
+    slowest = [item for item in slowest if item[0] not in (args.module, "site")][:5]
+    for name, cumulative in slowest:
+        print(f"  {cumulative / 1000:8.1f} ms  {name}")
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
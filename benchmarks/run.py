@@ -0,0 +1,307 @@
+"""Offline benchmark suite for the studytool converters.
+
+Builds synthetic fixtures at several sizes, runs each command's backend in a fresh
+process, and records wall time, throughput and peak RSS. Link titles and media files
+for ``download`` are served by a local HTTP stand-in, so nothing touches the network.
+
+    python benchmarks/run.py --sizes 10,100 --save-baseline benchmarks/baseline.json
+    python benchmarks/run.py --sizes 10,100 --compare benchmarks/baseline.json --threshold 0.25
+"""
+
+import argparse
+import importlib
+import json
+import multiprocessing
+import os
+import re
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+import fixtures
+
+# Backend module of each case, imported before timing starts
+CASES = {
+    "pdf2md": "studytool.pdf2text",
+    "pdflinks": "studytool.pdf2text",
+    "course": "studytool.slides2md",
+    "dedupe": "studytool.slides2md",
+    "pdfmerge": "studytool.pdf_merge",
+    "ebook2md": "studytool.ebook",
+    "t2s": "studytool.trad_to_simp",
+    "imgpath": "studytool.num_to_image_path",
+    "download": "studytool.youtube",
+}
+
+# Size of each synthetic media file served under /media/
+MEDIA_BYTES = 1_000_000
+
+
+class TitleHandler(BaseHTTPRequestHandler):
+    """Serve a small HTML page whose title is derived from the request path.
+
+    Paths under ``/media/`` return ``MEDIA_BYTES`` of video data instead, honouring
+    ``Range`` requests so interrupted downloads can be resumed.
+    """
+
+    def do_GET(self):
+        """Respond with an HTML page or a media file."""
+        if self.path.startswith("/media/"):
+            return self.send_media()
+
+        body = f"<html><head><title>Benchmark {self.path}</title></head><body>ok</body></html>".encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/html; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_HEAD(self):
+        """Respond with the headers of a media file."""
+        self.send_media(head=True)
+
+    def send_media(self, head: bool = False):
+        """Send (a range of) a deterministic media file."""
+        data = fixtures.media_bytes(self.path, MEDIA_BYTES)
+        start = 0
+        match = re.match(r"bytes=(\d+)-", self.headers.get("Range", ""))
+        if match and int(match.group(1)) < len(data):
+            start = int(match.group(1))
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {start}-{len(data) - 1}/{len(data)}")
+        else:
+            self.send_response(200)
+        self.send_header("Content-Type", "video/mp4")
+        self.send_header("Accept-Ranges", "bytes")
+        self.send_header("Content-Length", str(len(data) - start))
+        self.end_headers()
+        if not head:
+            try:
+                self.wfile.write(data[start:])
+            except (BrokenPipeError, ConnectionResetError):
+                # yt-dlp probes media URLs and hangs up after the first bytes
+                pass
+
+    def log_message(self, *args):
+        """Silence request logging."""
+
+
+def start_title_server() -> ThreadingHTTPServer:
+    """Start the local link-title stand-in on a free port."""
+    server = ThreadingHTTPServer(("127.0.0.1", 0), TitleHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def build_fixture(case: str, size: int, workdir: Path, base_url: str):
+    """Create the input for ``case`` at ``size``; returns (input path, units, unit name)."""
+    root = workdir / f"{case}-{size}"
+    if root.exists():
+        shutil.rmtree(root)
+    root.mkdir(parents=True)
+
+    if case == "pdf2md":
+        return fixtures.make_pdf(str(root / "doc.pdf"), size, base_url=base_url), size, "pages"
+    if case == "pdflinks":
+        for i in range(max(1, size // 10)):
+            fixtures.make_pdf(str(root / f"doc{i:03d}.pdf"), 10, base_url=base_url, seed=i)
+        return str(root), max(1, size // 10) * 10, "pages"
+    if case in ("course", "dedupe"):
+        return fixtures.make_course(str(root), decks=1, pages=size, base_url=base_url), size, "pages"
+    if case == "pdfmerge":
+        for i in range(10):
+            fixtures.make_pdf(str(root / f"part{i:02d}.pdf"), max(1, size // 10), base_url=base_url, seed=i)
+        return str(root), 10 * max(1, size // 10), "pages"
+    if case == "ebook2md":
+        return fixtures.make_epub(str(root / "book.epub"), size), size, "chapters"
+    if case == "download":
+        urls = root / "urls.txt"
+        urls.write_text("".join(f"{base_url}/media/video{i:03d}.mp4\n" for i in range(size)))
+        return str(urls), size * MEDIA_BYTES / 1e6, "MB"
+    if case in ("t2s", "imgpath"):
+        return fixtures.make_notes(str(root / "notes.md"), size * 10), size * 10, "sections"
+    raise ValueError(f"Unknown benchmark case: {case}")
+
+
+def run_case(case: str, path: str):
+    """Run the backend for ``case`` on ``path`` as the CLI command would."""
+    if case == "pdf2md":
+        from studytool.pdf2text import pdf_to_markdown
+
+        pdf_to_markdown(path, str(Path(path).with_suffix(".md")), extract_urls=True)
+    elif case == "pdflinks":
+        from studytool.pdf2text import extract_urls_from_pdf_folder
+
+        extract_urls_from_pdf_folder(path)
+    elif case == "course":
+        from studytool.slides2md import Slide2md
+
+        Slide2md(course_folder=path).run()
+    elif case == "dedupe":
+        from studytool.slides2md import Slide2md
+
+        # Every fixture page is a distinct slide, so none may be collapsed as a build
+        Slide2md(course_folder=path, dedupe=True, extract_text=True).run()
+        import fitz
+
+        for pdf in Path(path, "slides").glob("*.pdf"):
+            with fitz.open(pdf) as doc:
+                kept = len(list(Path(path, "docs", "imgs", pdf.stem).glob("*.jpg")))
+                if kept != len(doc):
+                    raise RuntimeError(f"dedupe kept {kept} of {len(doc)} distinct pages of {pdf.name}")
+    elif case == "pdfmerge":
+        from studytool.pdf_merge import merge_pdfs_in_dir
+
+        merge_pdfs_in_dir(dir_path=path, output_file=os.path.join(path, "merged.out"))
+    elif case == "ebook2md":
+        from studytool.ebook import epub_to_md, extract_imgs_from_epub
+
+        output_dir = Path(path).parent / "book"
+        epub_to_md(path, str(output_dir))
+        extract_imgs_from_epub(path, str(output_dir / "assets"))
+    elif case == "t2s":
+        from studytool.trad_to_simp import convert_trad_to_simp
+
+        convert_trad_to_simp(path)
+    elif case == "imgpath":
+        from studytool.num_to_image_path import num2img_path
+
+        num2img_path(path)
+    elif case == "download":
+        from studytool.youtube import download_videos
+
+        with open(path, "r", encoding="utf-8") as f:
+            urls = [line.strip() for line in f if line.strip()]
+        stats = download_videos(urls, output_dir=str(Path(path).parent / "videos"))
+        if stats.count("error"):
+            raise RuntimeError(f"{stats.count('error')} downloads failed")
+
+
+def _peak_rss_mb() -> float:
+    import resource
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024 / 1024 if sys.platform == "darwin" else peak / 1024
+
+
+def _child(case: str, path: str, results) -> None:
+    # Converters print status and progress; keep the benchmark report readable
+    sys.stdout = sys.stderr = open(os.devnull, "w")
+    from studytool.jobs import run_job
+
+    try:
+        importlib.import_module(CASES[case])
+        with run_job(case) as job:
+            start = time.perf_counter()
+            run_case(case, path)
+            elapsed = time.perf_counter() - start
+        results.put({"seconds": elapsed, "peak_rss_mb": _peak_rss_mb(), "stages": job.to_dict()["stages"]})
+    except Exception as e:
+        results.put({"error": f"{type(e).__name__}: {e}"})
+
+
+def measure(case: str, path: str) -> dict:
+    """Run one case in a fresh process so peak memory isn't shared between cases."""
+    ctx = multiprocessing.get_context("spawn")
+    results = ctx.Queue()
+    process = ctx.Process(target=_child, args=(case, path, results))
+    process.start()
+    result = results.get()
+    process.join()
+    return result
+
+
+def compare(results: list, baseline: dict, threshold: float, min_delta: float = 0.05) -> list:
+    """Return the cases that got slower (or used more memory) than the baseline by more than ``threshold``.
+
+    Differences below ``min_delta`` seconds are treated as noise.
+    """
+    regressions = []
+    for result in results:
+        key = f"{result['case']}@{result['size']}"
+        previous = baseline.get(key)
+        if not previous or "error" in result or "error" in previous:
+            continue
+        for metric in ("seconds", "peak_rss_mb"):
+            if metric == "seconds" and result[metric] - previous[metric] < min_delta:
+                continue
+            if result[metric] > previous[metric] * (1 + threshold):
+                regressions.append(f"{key} {metric}: {previous[metric]:.3f} -> {result[metric]:.3f}")
+    return regressions
+
+
+def main() -> int:
+    """Run the benchmark suite and return a process exit code."""
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--cases", default=",".join(CASES), help="Comma-separated cases to run")
+    parser.add_argument("--sizes", default="10,100,500", help="Comma-separated fixture sizes (pages/chapters)")
+    parser.add_argument("--repeat", type=int, default=1, help="Runs per case; the fastest is kept")
+    parser.add_argument("--workdir", default=None, help="Directory for fixtures (default: a temp dir)")
+    parser.add_argument("--save-baseline", default=None, help="Write results to this JSON file")
+    parser.add_argument("--compare", default=None, help="Baseline JSON file to compare against")
+    parser.add_argument("--threshold", type=float, default=0.25, help="Allowed slowdown before failing (0.25 = 25%%)")
+    parser.add_argument("--min-delta", type=float, default=0.05, help="Ignore slowdowns smaller than this (seconds)")
+    args = parser.parse_args()
+
+    if args.compare and not Path(args.compare).exists():
+        print(f"Baseline {args.compare} not found; run `make bench-baseline` first", file=sys.stderr)
+        return 2
+
+    # The studytool package is imported from the checkout, not an installed copy
+    sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+    os.environ["NO_PROXY"] = "127.0.0.1"
+
+    server = start_title_server()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+    workdir = Path(args.workdir or tempfile.mkdtemp(prefix="stt-bench-"))
+
+    results = []
+    print(f"{'case':<10} {'size':>6} {'seconds':>9} {'units/s':>10} {'peak MB':>8}  slowest stage")
+    for case in args.cases.split(","):
+        for size in (int(size) for size in args.sizes.split(",")):
+            runs = []
+            for _ in range(args.repeat):
+                path, units, unit = build_fixture(case, size, workdir, base_url)
+                runs.append(measure(case, path))
+            best = min(runs, key=lambda run: run.get("seconds", float("inf")))
+            result = {"case": case, "size": size, "units": units, "unit": unit, **best}
+            results.append(result)
+
+            if "error" in result:
+                print(f"{case:<10} {size:>6} {'error':>9}  {result['error']}")
+                continue
+            result["throughput"] = units / result["seconds"] if result["seconds"] else 0.0
+            stages = sorted(result["stages"].items(), key=lambda item: item[1]["seconds"], reverse=True)
+            slowest = f"{stages[0][0]} {stages[0][1]['seconds']:.3f}s" if stages else ""
+            print(
+                f"{case:<10} {size:>6} {result['seconds']:>9.3f} {result['throughput']:>10.1f} "
+                f"{result['peak_rss_mb']:>8.1f}  {slowest}"
+            )
+
+    server.shutdown()
+    if not args.workdir:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    if args.save_baseline:
+        with open(args.save_baseline, "w", encoding="utf-8") as f:
+            json.dump({f"{r['case']}@{r['size']}": r for r in results}, f, indent=2)
+        print(f"Baseline saved to {args.save_baseline}")
+
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            regressions = compare(results, json.load(f), args.threshold, args.min_delta)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            return 1
+        print(f"No regressions over {args.threshold:.0%} against {args.compare}")
+
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,181 @@
+import hashlib
+import os
+import re
+import socket
+import uuid
+from pathlib import Path
+from typing import Iterator, Optional, Tuple
+
+from .jobs import current_job
+
+_SIZE_RE = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([KMGT]?)B?\s*$", re.IGNORECASE)
+_digests = {}
+
+
+def parse_size(size: str) -> int:
+    """Parse a size such as "500M" or "10G" into bytes."""
+    match = _SIZE_RE.match(str(size))
+    if not match:
+        raise ValueError(f"Invalid size: {size}")
+    value, unit = match.groups()
+    return int(float(value) * 1024 ** "_KMGT".index(unit.upper() or "_"))
+
+
+def file_digest(path: str) -> str:
+    """SHA-256 of a file's content, memoized per (path, size, mtime) within the process."""
+    stat = os.stat(path)
+    memo_key = (os.path.abspath(path), stat.st_size, stat.st_mtime_ns)
+    if memo_key not in _digests:
+        digest = hashlib.sha256()
+        with open(path, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                digest.update(chunk)
+        _digests[memo_key] = digest.hexdigest()
+    return _digests[memo_key]
+
+
+class DirectoryBackend:
+    """Artifacts stored as files under a directory, which may be a mount shared by several machines.
+
+    Writes go to a uniquely named temporary file that is renamed into place, so
+    concurrent writers never expose partial artifacts.
+    """
+
+    def __init__(self, root: str):
+        """Initialize"""
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key: str) -> Path:
+        return self.root / key[:2] / key
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Artifact bytes for ``key``, or None; a hit refreshes its last-used time."""
+        path = self._path(key)
+        try:
+            data = path.read_bytes()
+        except FileNotFoundError:
+            return None
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        """Store ``data`` under ``key``."""
+        path = self._path(key)
+        path.parent.mkdir(exist_ok=True)
+        tmp = path.parent / f".{key}.{socket.gethostname()}.{os.getpid()}.{uuid.uuid4().hex[:8]}.tmp"
+        tmp.write_bytes(data)
+        os.replace(tmp, path)
+
+    def entries(self) -> Iterator[Tuple[Path, int, float]]:
+        """(path, size, last used) of every stored artifact."""
+        for folder in self.root.iterdir():
+            if not folder.is_dir():
+                continue
+            for path in folder.iterdir():
+                if path.name.startswith("."):
+                    continue
+                try:
+                    stat = path.stat()
+                except FileNotFoundError:
+                    continue
+                yield path, stat.st_size, stat.st_mtime
+
+    def delete(self, path: Path) -> None:
+        """Remove a stored artifact."""
+        try:
+            path.unlink()
+        except FileNotFoundError:
+            pass
+
+
+class ArtifactCache:
+    """Content-addressed cache for per-page outputs (rendered images, extracted text).
+
+    Keys are hashes of the source content (a page's content hash, or a whole PDF's for
+    per-document records), the artifact kind and the settings that produced it, so
+    identical content is converted once no matter which machine or path it comes from. Hits and misses are counted on the cache
+    and on the current job.
+    """
+
+    def __init__(self, backend: DirectoryBackend, max_bytes: Optional[int] = None):
+        """Initialize"""
+        self.backend = backend
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self.writes = 0
+
+    @staticmethod
+    def key(*parts) -> str:
+        """Cache key for the given parts (document digest, page, kind, settings...)."""
+        return hashlib.sha256("|".join(str(part) for part in parts).encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[bytes]:
+        """Cached bytes for ``key``, or None."""
+        data = self.backend.get(key)
+        if data is None:
+            self.misses += 1
+            current_job().count("cache_misses")
+        else:
+            self.hits += 1
+            current_job().count("cache_hits")
+        return data
+
+    def put(self, key: str, data: bytes) -> None:
+        """Store ``data`` under ``key``."""
+        self.backend.put(key, data)
+        self.writes += 1
+
+    def evict(self) -> int:
+        """Remove least recently used artifacts until the cache fits in ``max_bytes``.
+
+        Returns:
+            Number of artifacts removed.
+        """
+        if not self.max_bytes:
+            return 0
+
+        entries = sorted(self.backend.entries(), key=lambda entry: entry[2])
+        total = sum(size for _, size, _ in entries)
+        removed = 0
+        for path, size, _ in entries:
+            if total <= self.max_bytes:
+                break
+            self.backend.delete(path)
+            total -= size
+            removed += 1
+        return removed
+
+    def summary(self) -> str:
+        """One-line hit/miss summary."""
+        lookups = self.hits + self.misses
+        rate = 100 * self.hits / lookups if lookups else 0.0
+        return f"Cache: {self.hits} hits, {self.misses} misses ({rate:.0f}% hit rate), {self.writes} stored"
+
+
+def default_cache_dir() -> Path:
+    """Default local artifact cache: ``$XDG_CACHE_HOME/studytool/artifacts``."""
+    return Path(os.environ.get("XDG_CACHE_HOME", Path.home() / ".cache")) / "studytool" / "artifacts"
+
+
+def open_cache(
+    cache_dir: Optional[str] = None, max_size: Optional[str] = None, default: bool = False
+) -> Optional[ArtifactCache]:
+    """Open the artifact cache, or return None when caching is off.
+
+    Args:
+        cache_dir: Cache directory; defaults to ``$STT_CACHE_DIR``.
+        max_size: Size limit such as "10G"; defaults to ``$STT_CACHE_MAX_SIZE`` (unlimited if unset).
+        default: Fall back to ``default_cache_dir()`` when no directory is given. Otherwise
+            caching is off unless a directory is set.
+    """
+    cache_dir = cache_dir or os.environ.get("STT_CACHE_DIR") or (default_cache_dir() if default else None)
+    if not cache_dir:
+        return None
+
+    max_size = max_size or os.environ.get("STT_CACHE_MAX_SIZE")
+    return ArtifactCache(DirectoryBackend(cache_dir), max_bytes=parse_size(max_size) if max_size else None)
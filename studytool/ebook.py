@@ -5,6 +5,9 @@ import ebooklib
 from bs4 import BeautifulSoup
 from ebooklib import epub
 
+from .jobs import current_job
+from .search import notify_written
+
 
 def epub_to_chapters(epub_path):
     """
@@ -16,11 +19,16 @@ def epub_to_chapters(epub_path):
     Returns:
         list: List of (title, content) tuples for each chapter
     """
-    book = epub.read_epub(epub_path)
+    job = current_job()
+    with job.stage("open"):
+        book = epub.read_epub(epub_path)
     chapters = []
 
     for item in book.get_items():
-        if item.get_type() == ebooklib.ITEM_DOCUMENT:
+        if item.get_type() != ebooklib.ITEM_DOCUMENT:
+            continue
+
+        with job.stage("extract"):
             content = item.get_content().decode("utf-8")
             soup = BeautifulSoup(content, "html.parser")
 
@@ -42,6 +50,52 @@ def epub_to_chapters(epub_path):
     return chapters
 
 
+def chapter_to_markdown(title, html_content):
+    """
+    Convert a chapter's HTML to markdown.
+
+    Args:
+        title (str): Chapter title, used as the top-level heading
+        html_content (str): Chapter HTML
+
+    Returns:
+        str: Markdown content
+    """
+    soup = BeautifulSoup(html_content, "html.parser")
+    markdown_content = f"# {title}\n\n"
+
+    for element in soup.find_all(
+        [
+            "p",
+            "h1",
+            "h2",
+            "h3",
+            "h4",
+            "h5",
+            "h6",
+            "ul",
+            "ol",
+            "li",
+            "blockquote",
+            "pre",
+            "code",
+        ]
+    ):
+        if element.name.startswith("h"):
+            level = int(element.name[1])
+            markdown_content += f"{'#' * level} {element.get_text().strip()}\n\n"
+        elif element.name == "p":
+            markdown_content += f"{element.get_text().strip()}\n\n"
+        elif element.name == "li":
+            markdown_content += f"* {element.get_text().strip()}\n"
+        elif element.name == "pre" or element.name == "code":
+            markdown_content += f"```\n{element.get_text().strip()}\n```\n\n"
+        elif element.name == "blockquote":
+            markdown_content += f"> {element.get_text().strip()}\n\n"
+
+    return markdown_content
+
+
 def save_chapters_as_markdown(chapters, output_dir):
     """
     Save each chapter as a separate markdown file.
@@ -53,49 +107,23 @@ def save_chapters_as_markdown(chapters, output_dir):
     if not os.path.exists(output_dir):
         os.makedirs(output_dir)
 
-    for i, (title, html_content) in enumerate(chapters):
+    job = current_job()
+    for i, (title, html_content) in enumerate(job.track(chapters, description="Saving chapters")):
         safe_title = re.sub(r"[^\w\s-]", "", title).strip().replace(" ", "_")
         if not safe_title:
             safe_title = f"chapter_{i + 1}"
 
         filename = f"{i + 1:02d}_{safe_title}.md"
-        soup = BeautifulSoup(html_content, "html.parser")
-        markdown_content = f"# {title}\n\n"
-
-        for element in soup.find_all(
-            [
-                "p",
-                "h1",
-                "h2",
-                "h3",
-                "h4",
-                "h5",
-                "h6",
-                "ul",
-                "ol",
-                "li",
-                "blockquote",
-                "pre",
-                "code",
-            ]
-        ):
-            if element.name.startswith("h"):
-                level = int(element.name[1])
-                markdown_content += f"{'#' * level} {element.get_text().strip()}\n\n"
-            elif element.name == "p":
-                markdown_content += f"{element.get_text().strip()}\n\n"
-            elif element.name == "li":
-                markdown_content += f"* {element.get_text().strip()}\n"
-            elif element.name == "pre" or element.name == "code":
-                markdown_content += f"```\n{element.get_text().strip()}\n```\n\n"
-            elif element.name == "blockquote":
-                markdown_content += f"> {element.get_text().strip()}\n\n"
+        with job.stage("clean"):
+            markdown_content = chapter_to_markdown(title, html_content)
 
         output_path = os.path.join(output_dir, filename)
-        with open(output_path, "w", encoding="utf-8") as f:
+        with job.stage("write"), open(output_path, "w", encoding="utf-8") as f:
             f.write(markdown_content)
+        notify_written(output_path)
+        job.count("chapters")
 
-        print(f"Saved chapter: {title} to {filename}")
+        job.log(f"Saved chapter: {title} to {filename}")
 
 
 def epub_to_md(epub_path, output_dir):
@@ -106,11 +134,12 @@ def epub_to_md(epub_path, output_dir):
         epub_path (str): Path to the EPUB file
         output_dir (str): Directory to save markdown files
     """
-    print(f"Processing {epub_path}...")
+    job = current_job()
+    job.log(f"Processing {epub_path}...")
     chapters = epub_to_chapters(epub_path)
-    print(f"Found {len(chapters)} chapters.")
+    job.log(f"Found {len(chapters)} chapters.")
     save_chapters_as_markdown(chapters, output_dir)
-    print(f"Processing complete. Files saved to {output_dir}")
+    job.log(f"Processing complete. Files saved to {output_dir}")
 
 
 def extract_imgs_from_epub(epub_path, output_dir):
@@ -124,7 +153,9 @@ def extract_imgs_from_epub(epub_path, output_dir):
     if not os.path.exists(output_dir):
         os.makedirs(output_dir)
 
-    book = epub.read_epub(epub_path)
+    job = current_job()
+    with job.stage("open"):
+        book = epub.read_epub(epub_path)
 
     for item in book.get_items():
         if item.get_type() == ebooklib.ITEM_IMAGE:
@@ -132,10 +163,11 @@ def extract_imgs_from_epub(epub_path, output_dir):
             image_name = os.path.basename(item.get_name())
             image_path = os.path.join(output_dir, image_name)
 
-            with open(image_path, "wb") as f:
+            with job.stage("write"), open(image_path, "wb") as f:
                 f.write(image_content)
+            job.count("images")
 
-            print(f"Saved image: {image_name}")
+            job.log(f"Saved image: {image_name}")
 
 
 def extract_toc(epub_path, output_path=None):
@@ -154,11 +186,13 @@ def extract_toc(epub_path, output_path=None):
             base_name = os.path.splitext(os.path.basename(epub_path))[0]
             output_path = f"{base_name}_toc.txt"
 
-        book = epub.read_epub(epub_path)
+        job = current_job()
+        with job.stage("open"):
+            book = epub.read_epub(epub_path)
         toc = book.toc
 
         if not toc:
-            print("No table of contents found in this EPUB.")
+            job.log("No table of contents found in this EPUB.")
             return None
 
         with open(output_path, "w", encoding="utf-8") as f:
@@ -189,9 +223,9 @@ def extract_toc(epub_path, output_path=None):
 
             write_toc_items(toc)
 
-        print(f"Table of contents saved to: {output_path}")
+        job.log(f"Table of contents saved to: {output_path}")
         return output_path
 
     except Exception as e:
-        print(f"Error processing EPUB file: {e}")
+        current_job().log(f"Error processing EPUB file: {e}")
         return None
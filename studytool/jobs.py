@@ -0,0 +1,165 @@
+import contextlib
+import json
+import sys
+import threading
+import time
+from collections import defaultdict
+from contextvars import ContextVar
+from typing import Iterable, Iterator, Optional, TypeVar
+
+from rich.console import Console
+from rich.progress import BarColumn, MofNCompleteColumn, Progress, TextColumn, TimeElapsedColumn
+from rich.table import Table
+
+T = TypeVar("T")
+
+# Progress bars and profiles go to stderr so stdout carries only data and status lines
+err_console = Console(stderr=True, highlight=False)
+
+
+class Job:
+    """A unit of work that every converter reports progress and stage timings to.
+
+    Stages are named phases such as ``open``, ``extract``, ``clean``, ``fetch`` and
+    ``write``; their wall-clock time and call counts are accumulated across the job.
+    """
+
+    def __init__(self, name: str):
+        """Initialize"""
+        self.name = name
+        self.started = time.perf_counter()
+        self.finished: Optional[float] = None
+        self.stages = defaultdict(float)
+        self.calls = defaultdict(int)
+        self.counters = defaultdict(int)
+        self._lock = threading.Lock()
+        self._progress: Optional[Progress] = None
+        self._progress_depth = 0
+
+    @property
+    def elapsed(self) -> float:
+        """Seconds since the job started (or its total duration once finished)."""
+        return (self.finished or time.perf_counter()) - self.started
+
+    @contextlib.contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Time a block of work under the given stage name."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            with self._lock:
+                self.stages[name] += time.perf_counter() - start
+                self.calls[name] += 1
+
+    def count(self, name: str, n: int = 1) -> None:
+        """Increment a named counter (pages, chapters, urls, bytes, ...)."""
+        with self._lock:
+            self.counters[name] += n
+
+    def log(self, message: str) -> None:
+        """Print a message to stdout as-is (no wrapping), above any active progress bar."""
+        print(message)
+
+    def warn(self, message: str) -> None:
+        """Print a warning to stderr."""
+        print(message, file=sys.stderr)
+
+    def track(self, iterable: Iterable[T], description: str, total: Optional[int] = None) -> Iterator[T]:
+        """Iterate over ``iterable`` while showing a progress bar.
+
+        Nested calls share one display; inner bars are removed once they complete.
+        """
+        if total is None and hasattr(iterable, "__len__"):
+            total = len(iterable)
+
+        if self._progress is None:
+            self._progress = Progress(
+                TextColumn("{task.description}"),
+                BarColumn(),
+                MofNCompleteColumn(),
+                TimeElapsedColumn(),
+                console=err_console,
+                # Route prints above the bar only when stdout is the same terminal; piped output stays untouched
+                redirect_stdout=sys.stdout.isatty(),
+                redirect_stderr=False,
+            )
+            self._progress.start()
+        self._progress_depth += 1
+        nested = self._progress_depth > 1
+        task = self._progress.add_task(description, total=total)
+
+        try:
+            for item in iterable:
+                yield item
+                self._progress.advance(task)
+        finally:
+            self._progress_depth -= 1
+            if nested:
+                self._progress.remove_task(task)
+            if self._progress_depth == 0:
+                self._progress.stop()
+                self._progress = None
+
+    def finish(self) -> None:
+        """Mark the job as finished."""
+        self.finished = time.perf_counter()
+
+    def to_dict(self) -> dict:
+        """Job metrics as a JSON-serialisable dict."""
+        return {
+            "job": self.name,
+            "elapsed": round(self.elapsed, 6),
+            "stages": {
+                name: {"seconds": round(seconds, 6), "calls": self.calls[name]} for name, seconds in self.stages.items()
+            },
+            "counters": dict(self.counters),
+        }
+
+    def print_profile(self) -> None:
+        """Print a table of per-stage timings to stderr."""
+        table = Table(title=f"stt {self.name}: {self.elapsed:.3f}s")
+        table.add_column("Stage")
+        table.add_column("Seconds", justify="right")
+        table.add_column("%", justify="right")
+        table.add_column("Calls", justify="right")
+        for name, seconds in sorted(self.stages.items(), key=lambda item: item[1], reverse=True):
+            share = 100 * seconds / self.elapsed if self.elapsed else 0.0
+            table.add_row(name, f"{seconds:.3f}", f"{share:.1f}", str(self.calls[name]))
+        for name, value in self.counters.items():
+            table.add_row(f"[dim]{name}[/dim]", "", "", str(value))
+        err_console.print(table)
+
+    def write_metrics_json(self, path: str) -> None:
+        """Write the job metrics to a JSON file."""
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+
+# Work done outside of an explicit job (e.g. library use) is accounted here
+_default_job = Job("studytool")
+_current_job: ContextVar[Job] = ContextVar("current_job", default=_default_job)
+
+
+def current_job() -> Job:
+    """Return the job that work in the current context reports to."""
+    return _current_job.get()
+
+
+@contextlib.contextmanager
+def run_job(name: str) -> Iterator[Job]:
+    """Run a block of work as a new job.
+
+    Args:
+        name: Job name, usually the command being run.
+
+    Yields:
+        The job, which is also returned by ``current_job()`` inside the block.
+    """
+    job = Job(name)
+    token = _current_job.set(job)
+    try:
+        yield job
+    finally:
+        job.finish()
+        _current_job.reset(token)
@@ -1,8 +1,20 @@
 import re
+from functools import lru_cache
 
 import requests
 from bs4 import BeautifulSoup
 
+from .jobs import current_job
+
+# Successfully formatted links, kept for the lifetime of the process (e.g. the stt server)
+_link_cache = {}
+
+
+@lru_cache(maxsize=None)
+def session() -> requests.Session:
+    """Return a shared HTTP session so repeated lookups reuse connections."""
+    return requests.Session()
+
 
 def get_formatted_link(url: str) -> str:
     """
@@ -19,9 +31,13 @@ def get_formatted_link(url: str) -> str:
     if "arxiv.org/pdf/" in url.lower():
         url = url.replace("/pdf/", "/abs/")
 
+    if url in _link_cache:
+        return _link_cache[url]
+
     try:
-        response = requests.get(url, timeout=10)
-        response.raise_for_status()
+        with current_job().stage("fetch"):
+            response = session().get(url, timeout=10)
+            response.raise_for_status()
 
         soup = BeautifulSoup(response.content, "html.parser")
         title_tag = soup.find("title")
@@ -44,7 +60,8 @@ def get_formatted_link(url: str) -> str:
                 title = re.sub(r"^\[\d{4}\.\d{4,5}\]\s*", "", title)
                 title = f"{date_format} {title}"
 
-        return f"[{title}]({url})"
+        _link_cache[url] = f"[{title}]({url})"
+        return _link_cache[url]
 
     except Exception:
         # Fallback to URL as title if fetching fails
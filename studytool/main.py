@@ -1,27 +1,59 @@
 import re
 from pathlib import Path
+from typing import List
 
 import typer
 from rich.console import Console
 
-from .ebook import epub_to_md, extract_imgs_from_epub, extract_toc
-from .link import get_formatted_link
-from .num_to_image_path import num2img_path
-from .pdf2text import extract_urls_from_pdf_folder, pdf_to_markdown
-from .pdf_merge import merge_pdfs_in_dir
-from .slides2md import Slide2md
-from .trad_to_simp import convert_trad_to_simp
-from .youtube_playlist import playlist_titles
+# Backend modules pull in heavy dependencies (fitz, pdf2image, PyPDF2, ebooklib, bs4,
+# requests, opencc, youtube_dl, yt_dlp), so each command imports only what it needs
+# when it runs. `benchmarks/import_time.py` guards this.
 
 app = typer.Typer()
 console = Console()
 
 
+@app.callback()
+def cli(
+    ctx: typer.Context,
+    profile: bool = typer.Option(False, "--profile", help="Print per-stage timings when the command finishes"),
+    metrics_json: str = typer.Option(None, "--metrics-json", help="Write per-stage timings to a JSON file"),
+):
+    """A command-line study toolkit for PDF processing, video downloading, and text conversion.
+
+    Every command runs as a job that reports progress and per-stage timings
+    (open, extract, clean, fetch, write) through `studytool.jobs`.
+    """
+    from .jobs import run_job
+
+    def report():
+        if profile:
+            job.print_profile()
+        if metrics_json:
+            job.write_metrics_json(metrics_json)
+
+    # Close callbacks run last-in first-out, so the job is finished before it is reported
+    ctx.call_on_close(report)
+    job = ctx.with_resource(run_job(ctx.invoked_subcommand or "stt"))
+
+
 @app.command()
 def course(
     course: str = typer.Argument(default="./", help="Path to the course folder."),
     update_yaml_only: bool = typer.Option(default=False, help="Update MKDocs YAML Only"),
     dpi: int = typer.Option(default=100, help="DPI for PDF to image conversion"),
+    dedupe: bool = typer.Option(default=False, help="Collapse near-identical animation builds to their final page"),
+    dedupe_threshold: float = typer.Option(default=0.98, help="Build similarity (0-1) at which pages are collapsed"),
+    responsive: bool = typer.Option(default=False, help="Write thumbnails and lazy-loading <img> markup"),
+    thumb_widths: str = typer.Option(default="480,960", help="Comma-separated thumbnail widths for --responsive"),
+    text: bool = typer.Option(default=False, help="Add each slide's text and links, extracted while rendering"),
+    cache_dir: str = typer.Option(default=None, help="Shared page cache directory (default: $STT_CACHE_DIR)"),
+    cache_max_size: str = typer.Option(default=None, help="Evict the page cache down to this size, e.g. '10G'"),
+    target_width: int = typer.Option(default=None, help="Render every page this many pixels wide instead of --dpi"),
+    pixel_budget: int = typer.Option(default=None, help="Render every page to about this many pixels instead of --dpi"),
+    max_deck_pixels: int = typer.Option(
+        default=None, help="Scale a deck's pages down together to fit this many pixels"
+    ),
 ):
     """Process course materials and convert slides to markdown format.
 
@@ -29,8 +61,35 @@ def course(
         course: Path to the course folder containing slides and materials.
         update_yaml_only: If True, only updates MKDocs YAML configuration without processing slides.
         dpi: Resolution for PDF to image conversion (higher values = better quality).
+        dedupe: If True, runs of near-identical pages are collapsed to the last one before images are written.
+        dedupe_threshold: Minimum share of a page's ink kept unchanged by the next page to collapse them.
+        responsive: If True, also writes downscaled thumbnails and links pages with srcset, width/height and
+            loading="lazy" so large decks load quickly.
+        thumb_widths: Thumbnail widths in pixels used with --responsive.
+        text: If True, renders with PyMuPDF and pulls each page's text layer and links in the same pass,
+            writing them as alt text and a collapsible block under each slide.
+        cache_dir: Content-addressed cache for rendered pages and extracted text; may be on a shared mount.
+        cache_max_size: Size limit of the cache; least recently used artifacts are evicted after the run.
+        target_width: Width in pixels each page is rendered to, computed from the page's own size.
+        pixel_budget: Total pixels per page (width x height) each page is rendered to; ignored with target_width.
+        max_deck_pixels: Cap on the total pixels rendered for one deck.
     """
-    slide2md = Slide2md(course_folder=course, dpi=dpi)
+    from .cache import open_cache
+    from .slides2md import Slide2md
+
+    slide2md = Slide2md(
+        course_folder=course,
+        dpi=dpi,
+        dedupe=dedupe,
+        dedupe_threshold=dedupe_threshold,
+        responsive=responsive,
+        thumbnail_widths=tuple(int(width) for width in thumb_widths.split(",") if width.strip()),
+        extract_text=text,
+        cache=open_cache(cache_dir, cache_max_size),
+        target_width=target_width,
+        pixel_budget=pixel_budget,
+        max_deck_pixels=max_deck_pixels,
+    )
     slide2md.update_index_yaml() if update_yaml_only else slide2md.run()
 
 
@@ -45,6 +104,8 @@ def pdfmerge(
         dir_path: Path to the directory containing PDF files to merge.
         output_file: Name of the output merged PDF file.
     """
+    from .pdf_merge import merge_pdfs_in_dir
+
     merge_pdfs_in_dir(dir_path=dir_path, output_file=output_file)
 
 
@@ -59,9 +120,61 @@ def playlist(
         playlist: YouTube playlist URL to process.
         playlist_number: Maximum number of video titles to extract from the playlist.
     """
+    from .youtube_playlist import playlist_titles
+
     playlist_titles(url=playlist, number=playlist_number)
 
 
+@app.command()
+def download(
+    urls: List[str] = typer.Argument(None, help="Video or playlist URLs to download."),
+    file: str = typer.Option(None, help="Path to file containing URLs (one per line)"),
+    output_dir: str = typer.Option(default="./", help="Directory to save downloads to"),
+    workers: int = typer.Option(default=4, help="Number of concurrent downloads"),
+    archive: str = typer.Option(default="downloads.txt", help="Download archive file; completed items are skipped"),
+    format: str = typer.Option(default="best", help="yt-dlp format selector"),
+    audio_only: bool = typer.Option(default=False, help="Download the best audio stream only"),
+):
+    """Download videos and playlists concurrently with resume support.
+
+    Partially downloaded files are resumed, and every completed item is recorded in
+    the download archive so re-running the same command only fetches what is missing.
+
+    Args:
+        urls: Video or playlist URLs to download.
+        file: Path to file containing URLs (one per line).
+        output_dir: Directory the files are saved to.
+        workers: Number of concurrent downloads.
+        archive: Download archive file, relative to the output directory.
+        format: yt-dlp format selector.
+        audio_only: If True, downloads the best audio stream only.
+
+    Raises:
+        typer.Exit: If no URLs are given, the URL file doesn't exist, or any download fails.
+    """
+    from .youtube import download_videos
+
+    urls = list(urls or [])
+    if file:
+        file_path = Path(file)
+        if not file_path.exists():
+            typer.echo(f"Error: File {file} not found", err=True)
+            raise typer.Exit(1)
+
+        with open(file_path, "r", encoding="utf-8") as f:
+            urls.extend(line.strip() for line in f if line.strip().startswith("http"))
+
+    if not urls:
+        typer.echo("Error: Either provide URLs or use --file option", err=True)
+        raise typer.Exit(1)
+
+    stats = download_videos(
+        urls, output_dir=output_dir, workers=workers, archive=archive, format=format, audio_only=audio_only
+    )
+    if stats.count("error"):
+        raise typer.Exit(1)
+
+
 @app.command()
 def imgpath(
     md_path: str = typer.Argument(default=None, help="Path to the markdown file"),
@@ -82,6 +195,8 @@ def imgpath(
     """
     import time
 
+    from .num_to_image_path import num2img_path
+
     num2img_path(md_path=md_path, pattern=pattern)
 
     if not once:
@@ -101,6 +216,8 @@ def t2s(
     Args:
         file_path: Path to the markdown or text file containing Traditional Chinese text.
     """
+    from .trad_to_simp import convert_trad_to_simp
+
     convert_trad_to_simp(file_path=file_path)
 
 
@@ -123,6 +240,8 @@ def link(
     Raises:
         typer.Exit: If neither URL nor file is provided, or if file doesn't exist.
     """
+    from .link import get_formatted_link
+
     if file:
         file_path = Path(file)
         if not file_path.exists():
@@ -163,21 +282,44 @@ def pdf2md(
     output: str = typer.Option(None, help="Output markdown file path (optional)"),
     extract_urls: bool = typer.Option(False, help="Extract URLs from PDF and include in markdown"),
     url_sort: str = typer.Option("desc", help="Sort order for URLs: 'asc' (ascending) or 'desc' (descending)"),
+    ocr: bool = typer.Option(False, help="OCR pages with little or no text layer (needs Tesseract)"),
+    ocr_language: str = typer.Option("eng", help="Tesseract language code(s), e.g. 'eng+chi_sim'"),
+    ocr_engine: str = typer.Option("tesseract", help="OCR engine: 'tesseract' (via PyMuPDF) or 'pytesseract'"),
+    ocr_workers: int = typer.Option(None, help="Number of OCR worker processes (default: CPU count)"),
+    ocr_min_chars: int = typer.Option(40, help="Pages with fewer non-space characters of text are OCRed"),
+    cache_dir: str = typer.Option(None, help="Shared page cache directory (default: $STT_CACHE_DIR)"),
+    cache_max_size: str = typer.Option(None, help="Evict the page cache down to this size, e.g. '10G'"),
+    images: bool = typer.Option(False, help="Copy embedded images out unchanged and link them under their page"),
 ):
     """Convert PDF file to markdown format with optional URL extraction.
 
     Extracts text content from PDF and converts it to markdown format.
-    Optionally extracts and lists all URLs found in the PDF.
+    Optionally extracts and lists all URLs found in the PDF, and OCRs
+    scanned pages that have no text layer.
 
     Args:
         pdf_path: Path to the PDF file to convert.
         output: Output path for the markdown file. If not provided, uses PDF name with .md extension.
         extract_urls: If True, extracts all URLs from the PDF and appends them to the markdown.
         url_sort: Sort order for extracted URLs - 'asc' for ascending, 'desc' for descending.
+        ocr: If True, OCRs pages with little or no text in a process pool; results are cached by page image hash.
+        ocr_language: Tesseract language code(s) used for OCR.
+        ocr_engine: Name of the OCR engine.
+        ocr_workers: Number of OCR worker processes.
+        ocr_min_chars: Pages whose text layer has fewer non-space characters count as scans, so a
+            page number or running header alone doesn't stop a scanned page from being OCRed.
+        cache_dir: Cache for extracted page text, shared with ``pdflinks`` and ``course``
+            (default: ``$STT_CACHE_DIR``, else ``~/.cache/studytool/artifacts``).
+        cache_max_size: Size limit of the cache; least recently used artifacts are evicted after the run.
+        images: If True, embedded images are written to ``<pdf name>_images`` next to the output
+            without re-encoding and linked from the page they appear on.
 
     Raises:
         typer.Exit: If PDF file doesn't exist or conversion fails.
     """
+    from .cache import open_cache
+    from .pdf2text import pdf_to_markdown
+
     pdf_file = Path(pdf_path)
     if not pdf_file.exists():
         console.print(f"[red]Error: PDF file not found: {pdf_path}[/red]")
@@ -186,8 +328,23 @@ def pdf2md(
     if not output:
         output = pdf_file.with_suffix(".md")
 
+    cache = open_cache(cache_dir, cache_max_size, default=True)
     try:
-        content = pdf_to_markdown(pdf_path, output, extract_urls=extract_urls, url_sort=url_sort)
+        content = pdf_to_markdown(
+            pdf_path,
+            output,
+            extract_urls=extract_urls,
+            url_sort=url_sort,
+            ocr=ocr,
+            ocr_language=ocr_language,
+            ocr_engine=ocr_engine,
+            ocr_workers=ocr_workers,
+            ocr_min_chars=ocr_min_chars,
+            cache=cache,
+            images=images,
+        )
+        cache.evict()
+        console.print(f"[blue]{cache.summary()}[/blue]")
         console.print(f"[green]✅ Successfully converted PDF to Markdown: {output}[/green]")
         console.print(f"[blue]📄 Generated {len(content.split())} words[/blue]")
 
@@ -203,11 +360,41 @@ def pdf2md(
         raise typer.Exit(1)
 
 
+@app.command()
+def pdfimages(
+    pdf_path: str = typer.Argument(..., help="Path to the PDF file"),
+    output_dir: str = typer.Option(None, help="Output folder (default: <pdf name>_images next to the PDF)"),
+    min_size: int = typer.Option(0, help="Skip images smaller than this many pixels on either side"),
+):
+    """Extract the embedded images of a PDF without rasterizing pages.
+
+    JPEG and JPEG 2000 images are copied byte for byte; other images are exported
+    losslessly. Images repeated across pages are written once.
+
+    Args:
+        pdf_path: Path to the PDF file.
+        output_dir: Folder for the extracted images.
+        min_size: Minimum width and height in pixels; smaller images (icons, rules) are skipped.
+
+    Raises:
+        typer.Exit: If the PDF doesn't exist or extraction fails.
+    """
+    from .pdf_images import extract_images
+
+    try:
+        extract_images(pdf_path, output_dir, min_size=min_size)
+    except Exception as e:
+        console.print(f"[red]Error extracting images: {str(e)}[/red]")
+        raise typer.Exit(1)
+
+
 @app.command()
 def pdflinks(
     folder_path: str = typer.Argument(..., help="Path to folder containing PDF files"),
     output: str = typer.Option("links.md", help="Output markdown file name"),
     url_sort: str = typer.Option("desc", help="Sort order for URLs: 'asc' (ascending) or 'desc' (descending)"),
+    cache_dir: str = typer.Option(None, help="Page text cache directory (default: $STT_CACHE_DIR)"),
+    cache_max_size: str = typer.Option(None, help="Evict the page cache down to this size, e.g. '10G'"),
 ):
     """Extract all URLs from PDF files in a folder and save to markdown.
 
@@ -218,12 +405,21 @@ def pdflinks(
         folder_path: Path to folder containing PDF files to process.
         output: Name of the output markdown file for the extracted URLs.
         url_sort: Sort order for URLs - 'asc' for ascending, 'desc' for descending.
+        cache_dir: Cache for extracted page text, shared with ``pdf2md`` and ``course``
+            (default: ``$STT_CACHE_DIR``, else ``~/.cache/studytool/artifacts``).
+        cache_max_size: Size limit of the cache; least recently used artifacts are evicted after the run.
 
     Raises:
         typer.Exit: If folder doesn't exist or URL extraction fails.
     """
+    from .cache import open_cache
+    from .pdf2text import extract_urls_from_pdf_folder
+
+    cache = open_cache(cache_dir, cache_max_size, default=True)
     try:
-        output_path = extract_urls_from_pdf_folder(folder_path, output, url_sort)
+        output_path = extract_urls_from_pdf_folder(folder_path, output, url_sort, cache=cache)
+        cache.evict()
+        console.print(f"[blue]{cache.summary()}[/blue]")
         console.print("[green]✅ Successfully extracted URLs from PDF files[/green]")
         console.print(f"[blue]📄 Output saved to: {output_path}[/blue]")
 
@@ -241,6 +437,53 @@ def pdflinks(
         raise typer.Exit(1)
 
 
+@app.command()
+def pipeline(
+    input_path: str = typer.Argument(..., help="PDF, EPUB or Markdown file"),
+    output: str = typer.Option(
+        None, help="Output markdown file (default: input with .md suffix; .md is edited in place)"
+    ),
+    t2s: bool = typer.Option(False, help="Convert Traditional to Simplified Chinese"),
+    links: bool = typer.Option(False, help="Resolve URLs to titled links under 'Extracted URLs'"),
+    url_sort: str = typer.Option("desc", help="Sort order for URLs: 'asc' (ascending) or 'desc' (descending)"),
+    workers: int = typer.Option(8, help="Threads for resolving links"),
+    cache_dir: str = typer.Option(None, help="Page text cache directory (default: $STT_CACHE_DIR)"),
+):
+    """Convert a file to Markdown in one in-memory pass, replacing pdf2md | t2s | link chains.
+
+    Pages or chapters are extracted, cleaned, optionally converted to Simplified Chinese
+    and link-resolved in memory, and the Markdown is written once at the end.
+
+    Args:
+        input_path: PDF, EPUB or Markdown/text file to convert.
+        output: Output path for the markdown file. Markdown input is rewritten in place by default.
+        t2s: If True, converts Traditional to Simplified Chinese with OpenCC.
+        links: If True, fetches the titles of all URLs (in parallel) and lists them as Markdown links.
+        url_sort: Sort order for URLs - 'asc' for ascending, 'desc' for descending.
+        workers: Number of threads used to resolve links.
+        cache_dir: Cache for extracted PDF page text, shared with ``pdf2md`` and ``pdflinks``.
+
+    Raises:
+        typer.Exit: If the input doesn't exist or conversion fails.
+    """
+    from .cache import open_cache
+    from .pipeline import convert_file
+
+    try:
+        convert_file(
+            input_path,
+            output,
+            simplified=t2s,
+            links=links,
+            url_sort=url_sort,
+            workers=workers,
+            cache=open_cache(cache_dir, default=True),
+        )
+    except Exception as e:
+        console.print(f"[red]Error converting {input_path}: {str(e)}[/red]")
+        raise typer.Exit(1)
+
+
 @app.command()
 def ebook2md(
     epub_path: str = typer.Argument(..., help="Path to the EPUB file"),
@@ -262,6 +505,8 @@ def ebook2md(
     Raises:
         typer.Exit: If EPUB file doesn't exist or conversion fails.
     """
+    from .ebook import epub_to_md, extract_imgs_from_epub, extract_toc
+
     epub_file = Path(epub_path)
     if not epub_file.exists():
         console.print(f"[red]Error: EPUB file not found: {epub_path}[/red]")
@@ -301,5 +546,78 @@ def ebook2md(
         raise typer.Exit(1)
 
 
+@app.command()
+def index(
+    folder: str = typer.Argument(default="./", help="Root of the Markdown tree to index"),
+    trigram: bool = typer.Option(False, help="Use trigram tokenizing (substring matching, good for Chinese text)"),
+):
+    """Build or update a full-text search index over the Markdown files in a folder.
+
+    Only new or changed files (by content hash) are re-indexed. Once the index exists,
+    pdf2md, ebook2md, course and t2s keep it up to date as they write Markdown.
+
+    Args:
+        folder: Root of the Markdown tree; the index is stored there as .stt-index.sqlite.
+        trigram: If True, a new index matches substrings instead of words.
+    """
+    from .search import build_index
+
+    build_index(folder, trigram=trigram)
+
+
+@app.command()
+def search(
+    query: str = typer.Argument(..., help='Search query (words, "phrases", prefix*, AND/OR/NOT)'),
+    folder: str = typer.Option("./", help="Folder inside the indexed tree"),
+    limit: int = typer.Option(10, help="Maximum number of results"),
+):
+    """Search the full-text index and print ranked snippets.
+
+    Args:
+        query: FTS5 query string.
+        folder: Folder inside the indexed tree; the nearest index above it is used.
+        limit: Maximum number of results.
+
+    Raises:
+        typer.Exit: If no index covers the folder or the index can't be queried.
+    """
+    import sqlite3
+
+    from .search import search_index
+
+    try:
+        search_index(query, folder=folder, limit=limit)
+    except FileNotFoundError as e:
+        console.print(f"[red]Error: {e}[/red]")
+        raise typer.Exit(1)
+    except sqlite3.OperationalError as e:
+        console.print(f"[red]Error: search failed: {e}[/red]")
+        raise typer.Exit(1)
+
+
+@app.command()
+def serve(stop: bool = typer.Option(False, help="Stop the running server")):
+    """Run a persistent stt server that keeps converters and HTTP sessions warm.
+
+    While the server is running, quick commands (imgpath, t2s, link) are passed to it
+    instead of starting a fresh interpreter. Requests run one at a time, so long batches
+    (link --file, imgpath --no-once) always run in-process. Without a server, every
+    command runs in-process as usual. Set STT_NO_DAEMON=1 to bypass a running server.
+
+    The socket is $STT_SOCKET, else stt.sock in $XDG_RUNTIME_DIR, the same path clients
+    connect to, so set STT_SOCKET for both the server and the commands to move it.
+
+    Args:
+        stop: If True, stops the running server instead of starting one.
+    """
+    from . import server
+
+    if stop:
+        message = "stt server stopped" if server.stop() else "No stt server running"
+        console.print(message)
+    else:
+        server.serve()
+
+
 if __name__ == "__main__":
     app()
@@ -2,6 +2,8 @@ import os
 import re
 from typing import List, Optional, Tuple
 
+from .jobs import current_job
+
 
 def num2img_path(md_path: str, pattern: Optional[str] = None) -> None:
     """
@@ -11,43 +13,45 @@ def num2img_path(md_path: str, pattern: Optional[str] = None) -> None:
         md_path: Path to the markdown file
         pattern: Custom pattern to replace with image paths (defaults to "、")
     """
+    job = current_job()
     if not os.path.exists(md_path):
-        print(f"Error: File {md_path} not found.")
+        job.log(f"Error: File {md_path} not found.")
         return
 
     try:
-        with open(md_path, "r", encoding="utf-8") as file:
+        with job.stage("open"), open(md_path, "r", encoding="utf-8") as file:
             content = file.read()
     except Exception as e:
-        print(f"Error reading file: {e}")
+        job.log(f"Error reading file: {e}")
         return
 
     folder = os.path.basename(md_path).split(".")[0]
-    print(f"Using folder name: {folder}")
+    job.log(f"Using folder name: {folder}")
 
     # Get the last image number used
     last_number = find_last_image_number(content)
-    print(f"Last image number: {last_number}")
+    job.log(f"Last image number: {last_number}")
 
-    # Process content
-    updated_content = replace_numbers_with_images(content, folder)
+    with job.stage("clean"):
+        # Process content
+        updated_content = replace_numbers_with_images(content, folder)
 
-    # Handle the replacement pattern
-    updated_last = str(last_number + 1).zfill(3)
-    replace_pattern = pattern if pattern else "、"
+        # Handle the replacement pattern
+        updated_last = str(last_number + 1).zfill(3)
+        replace_pattern = pattern if pattern else "、"
 
-    updated_content = re.sub(
-        f"\n{replace_pattern}\n",
-        rf"\n![{updated_last}](imgs/{folder}/{updated_last}.jpg)\n",
-        updated_content,
-    )
+        updated_content = re.sub(
+            f"\n{replace_pattern}\n",
+            rf"\n![{updated_last}](imgs/{folder}/{updated_last}.jpg)\n",
+            updated_content,
+        )
 
     try:
-        with open(md_path, "w", encoding="utf-8") as file:
+        with job.stage("write"), open(md_path, "w", encoding="utf-8") as file:
             file.write(updated_content)
-        print(f"Find and replace operation completed. Modified file: {md_path}")
+        job.log(f"Find and replace operation completed. Modified file: {md_path}")
     except Exception as e:
-        print(f"Error writing to file: {e}")
+        job.log(f"Error writing to file: {e}")
 
 
 def find_last_image_number(content: str) -> int:
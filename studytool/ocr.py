@@ -0,0 +1,136 @@
+import contextlib
+import hashlib
+import io
+import os
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, as_completed, wait
+from typing import Callable, Dict, Iterable, Optional
+
+import fitz
+
+from .cache import ArtifactCache, open_cache
+from .jobs import current_job
+
+# Pages with fewer non-space characters than this are treated as scans: a page number,
+# running header or producer stamp alone doesn't make a text layer
+MIN_TEXT_CHARS = 40
+
+
+def ocr_tesseract(png: bytes, language: str) -> str:
+    """OCR a PNG page image with Tesseract through PyMuPDF's built-in OCR hook.
+
+    Needs Tesseract installed and ``TESSDATA_PREFIX`` pointing at its language data.
+    """
+    pixmap = fitz.Pixmap(png)
+    with fitz.open("pdf", pixmap.pdfocr_tobytes(language=language)) as doc:
+        return doc[0].get_text()
+
+
+def ocr_pytesseract(png: bytes, language: str) -> str:
+    """OCR a PNG page image with the optional ``pytesseract`` package."""
+    import pytesseract
+    from PIL import Image
+
+    return pytesseract.image_to_string(Image.open(io.BytesIO(png)), lang=language)
+
+
+# Engines take PNG bytes and a Tesseract-style language code and return the page text.
+# They run in worker processes, so they must be importable module-level functions.
+OCR_ENGINES: Dict[str, Callable[[bytes, str], str]] = {
+    "tesseract": ocr_tesseract,
+    "pytesseract": ocr_pytesseract,
+}
+
+
+def register_engine(name: str, engine: Callable[[bytes, str], str]) -> None:
+    """Make an OCR engine available under ``name``."""
+    OCR_ENGINES[name] = engine
+
+
+def needs_ocr(text: str, min_chars: int = MIN_TEXT_CHARS) -> bool:
+    """Whether a page's extracted text has fewer than ``min_chars`` non-space characters to count as a text layer."""
+    return sum(not char.isspace() for char in text) < min_chars
+
+
+def ocr_pages(
+    doc: fitz.Document,
+    page_numbers: Iterable[int],
+    language: str = "eng",
+    engine: str = "tesseract",
+    dpi: int = 300,
+    workers: Optional[int] = None,
+    cache: Optional[ArtifactCache] = None,
+) -> Dict[int, str]:
+    """OCR the given pages of an open document in a process pool.
+
+    Pages are rendered here and hashed; pages whose image was OCRed before (with the
+    same engine and language) come from the cache and are never sent to the pool. Each
+    miss is submitted as soon as it is rendered, so rendering overlaps with OCR, and at
+    most two pages per worker are held in memory at a time.
+
+    Args:
+        doc: Open PyMuPDF document.
+        page_numbers: Zero-based page numbers to OCR.
+        language: Tesseract language code(s), e.g. "eng" or "eng+chi_sim".
+        engine: Name of a registered OCR engine.
+        dpi: Render resolution for OCR.
+        workers: Worker processes (defaults to the CPU count).
+        cache: Artifact cache for OCR results (defaults to ``open_cache(default=True)``,
+            i.e. ``--cache-dir``/``$STT_CACHE_DIR`` or the local artifact cache).
+
+    Returns:
+        Mapping of page number to OCR text.
+    """
+    if engine not in OCR_ENGINES:
+        raise ValueError(f"Unknown OCR engine: {engine} (available: {', '.join(OCR_ENGINES)})")
+
+    job = current_job()
+    cache = cache or open_cache(default=True)
+    workers = workers or os.cpu_count() or 1
+    results: Dict[int, str] = {}
+    texts: Dict[str, str] = {}
+    # Identical page images (repeated scans, blank pages) are OCRed once: key -> page numbers
+    waiting: Dict[str, list] = {}
+    running: Dict[Future, str] = {}
+
+    def collect(futures: Iterable[Future]) -> None:
+        for future in futures:
+            key = running.pop(future)
+            texts[key] = future.result()
+            cache.put(ArtifactCache.key(key, "ocr"), texts[key].encode("utf-8"))
+            job.count("ocr_pages", len(waiting[key]))
+            for page_num in waiting.pop(key):
+                results[page_num] = texts[key]
+
+    with contextlib.ExitStack() as stack:
+        pool = None
+        for page_num in job.track(list(page_numbers), description="OCR"):
+            with job.stage("render"):
+                png = doc.load_page(page_num).get_pixmap(dpi=dpi).tobytes("png")
+            key = hashlib.sha256(png + f"|{engine}|{language}".encode()).hexdigest()
+
+            if key in texts:
+                results[page_num] = texts[key]
+                continue
+            if key in waiting:
+                waiting[key].append(page_num)
+                continue
+
+            cached = cache.get(ArtifactCache.key(key, "ocr"))
+            if cached is not None:
+                texts[key] = results[page_num] = cached.decode("utf-8")
+                job.count("ocr_cache_hits")
+                continue
+
+            if pool is None:
+                pool = stack.enter_context(ProcessPoolExecutor(max_workers=workers))
+            waiting[key] = [page_num]
+            running[pool.submit(OCR_ENGINES[engine], png, language)] = key
+            if len(running) >= 2 * workers:
+                with job.stage("ocr"):
+                    done, _ = wait(running, return_when=FIRST_COMPLETED)
+                collect(done)
+
+        with job.stage("ocr"):
+            collect(as_completed(list(running)))
+
+    return results
@@ -1,13 +1,33 @@
+import json
+import os
 import re
+import zlib
 from pathlib import Path
+from typing import Dict, List, Optional, Tuple
 
 import fitz
-from tqdm import tqdm
 
+from .cache import ArtifactCache, file_digest
+from .jobs import current_job
 from .link import get_formatted_link
-
-
-def pdf_to_markdown(pdf_path: str, output_path: str = None, extract_urls: bool = False, url_sort: str = "desc") -> str:
+from .ocr import MIN_TEXT_CHARS, needs_ocr, ocr_pages
+from .pdf_images import extract_page_images
+from .search import notify_written
+
+
+def pdf_to_markdown(
+    pdf_path: str,
+    output_path: str = None,
+    extract_urls: bool = False,
+    url_sort: str = "desc",
+    ocr: bool = False,
+    ocr_language: str = "eng",
+    ocr_engine: str = "tesseract",
+    ocr_workers: int = None,
+    cache: Optional[ArtifactCache] = None,
+    images: bool = False,
+    ocr_min_chars: int = MIN_TEXT_CHARS,
+) -> str:
     """Convert a PDF file to markdown format.
 
     Args:
@@ -15,6 +35,14 @@ def pdf_to_markdown(pdf_path: str, output_path: str = None, extract_urls: bool =
         output_path: Optional path to save the output file
         extract_urls: Whether to extract URLs from the PDF
         url_sort: Sort order for URLs ("asc" or "desc")
+        ocr: Whether to OCR pages with little or no text layer (see ``ocr_min_chars``)
+        ocr_language: Tesseract language code(s) for OCR, e.g. "eng+chi_sim"
+        ocr_engine: Name of the OCR engine (see ``studytool.ocr.OCR_ENGINES``)
+        ocr_workers: Number of OCR worker processes (defaults to the CPU count)
+        cache: Optional artifact cache for per-page text, shared with ``stt pdflinks`` and ``stt course --text``
+        images: Whether to copy the embedded images out (see ``studytool.pdf_images``) and link
+            them under their page, in a ``<pdf name>_images`` folder next to the Markdown
+        ocr_min_chars: Pages with fewer non-space characters of text are treated as scans and OCRed
 
     Returns:
         The markdown content as a string
@@ -23,23 +51,51 @@ def pdf_to_markdown(pdf_path: str, output_path: str = None, extract_urls: bool =
     if not pdf_path.exists():
         raise FileNotFoundError(f"PDF file not found: {pdf_path}")
 
-    doc = fitz.open(pdf_path)
+    job = current_job()
+    with job.stage("open"):
+        doc = fitz.open(pdf_path)
     markdown_content = [f"# {pdf_path.stem}", ""]
     all_urls = []
-
-    for page_num in tqdm(range(len(doc)), desc=f"Processing {pdf_path.name}"):
-        page = doc.load_page(page_num)
-        text = page.get_text()
-
-        if text.strip():
-            markdown_content.extend([f"## Page {page_num + 1}", "", clean_pdf_text(text), ""])
+    texts = []
+    page_texts = PageTexts(doc, file_digest(pdf_path) if cache else None, cache)
+
+    for page_num in job.track(range(len(doc)), description=f"Processing {pdf_path.name}"):
+        texts.append(page_texts.get(page_num)[0])
+        job.count("pages")
+    page_texts.save()
+
+    image_only = [page_num for page_num, text in enumerate(texts) if needs_ocr(text, ocr_min_chars)]
+    if image_only and ocr:
+        for page_num, text in ocr_pages(
+            doc, image_only, language=ocr_language, engine=ocr_engine, workers=ocr_workers, cache=cache
+        ).items():
+            # A failed OCR keeps whatever the text layer had (e.g. the page header)
+            if text.strip():
+                texts[page_num] = text
+    elif image_only:
+        job.log(f"{len(image_only)} pages with little or no text layer were not OCRed (use --ocr to OCR them)")
+
+    page_images = {}
+    if images:
+        markdown_dir = Path(output_path).parent if output_path else pdf_path.parent
+        page_images = extract_page_images(doc, markdown_dir / f"{pdf_path.stem}_images", prefix=pdf_path.stem)
+
+    for page_num, text in enumerate(texts):
+        if text.strip() or page_num in page_images:
+            markdown_content.extend([f"## Page {page_num + 1}", ""])
+            if text.strip():
+                with job.stage("clean"):
+                    markdown_content.extend([clean_pdf_text(text), ""])
+            for image_path in page_images.get(page_num, []):
+                link = Path(os.path.relpath(image_path, markdown_dir)).as_posix()
+                markdown_content.extend([f"![{image_path.stem}]({link})", ""])
 
             if extract_urls:
                 all_urls.extend(extract_urls_from_text(text))
 
     if extract_urls and all_urls:
         unique_urls = list(set(all_urls))
-        formatted_links = [get_formatted_link(url) for url in tqdm(unique_urls, desc="Formatting URLs")]
+        formatted_links = [get_formatted_link(url) for url in job.track(unique_urls, description="Formatting URLs")]
 
         formatted_links.sort(reverse=(url_sort.lower() != "asc"))
 
@@ -53,12 +109,65 @@ def pdf_to_markdown(pdf_path: str, output_path: str = None, extract_urls: bool =
     if output_path:
         output_path = Path(output_path)
         output_path.parent.mkdir(parents=True, exist_ok=True)
-        with open(output_path, "w", encoding="utf-8") as f:
+        with job.stage("write"), open(output_path, "w", encoding="utf-8") as f:
             f.write(final_content)
+        notify_written(output_path)
 
     return final_content
 
 
+def page_text_and_links(page: fitz.Page) -> Tuple[str, List[str]]:
+    """Text layer and link annotation URIs (deduplicated, in order) of a page."""
+    links = [link["uri"] for link in page.get_links() if link.get("uri")]
+    return page.get_text(), list(dict.fromkeys(links))
+
+
+class PageTexts:
+    """Text and link URIs of a document's pages, cached as one compressed record per document.
+
+    The record is keyed by the document's content hash, so a changed PDF is extracted
+    again while pages already extracted from an unchanged one are read back instead.
+    Without a cache it simply extracts each page on request.
+    """
+
+    def __init__(self, doc: fitz.Document, digest: str = None, cache: Optional[ArtifactCache] = None):
+        """Initialize"""
+        self.doc = doc
+        self.cache = cache
+        self.key = ArtifactCache.key(digest, "pages") if cache else None
+        self.pages: Dict[int, Tuple[str, List[str]]] = {}
+        self.dirty = False
+
+        data = cache.get(self.key) if cache else None
+        if data is not None:
+            try:
+                self.pages = {int(n): (text, links) for n, (text, links) in json.loads(zlib.decompress(data)).items()}
+            except (zlib.error, ValueError):
+                # A damaged record is rebuilt from the document
+                pass
+
+    def get(self, page_num: int) -> Tuple[str, List[str]]:
+        """(text, links) of a zero-based page, extracting it on a cache miss."""
+        job = current_job()
+        if page_num in self.pages:
+            job.count("pages_cached")
+            return self.pages[page_num]
+
+        with job.stage("extract"):
+            self.pages[page_num] = page_text_and_links(self.doc.load_page(page_num))
+        self.dirty = True
+        return self.pages[page_num]
+
+    def save(self) -> None:
+        """Write newly extracted pages back to the cache."""
+        if not (self.cache and self.dirty):
+            return
+        with current_job().stage("cache"):
+            record = json.dumps(self.pages, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+            self.cache.put(self.key, zlib.compress(record, 6))
+        self.dirty = False
+
+
 def extract_urls_from_text(text: str) -> list:
     """Extract URLs from text using regex patterns.
 
@@ -110,13 +219,16 @@ def clean_pdf_text(text: str) -> str:
     return "\n".join(formatted_lines)
 
 
-def extract_urls_from_pdf_folder(folder_path: str, output_file: str = "links.md", url_sort: str = "desc") -> str:
+def extract_urls_from_pdf_folder(
+    folder_path: str, output_file: str = "links.md", url_sort: str = "desc", cache: Optional[ArtifactCache] = None
+) -> str:
     """Extract URLs from all PDF files in a folder and save to markdown.
 
     Args:
         folder_path: Path to folder containing PDF files
         output_file: Name of output markdown file
         url_sort: Sort order for URLs ("asc" or "desc")
+        cache: Optional artifact cache for per-page text, shared with ``stt pdf2md``
 
     Returns:
         Path to the created output file
@@ -132,25 +244,29 @@ def extract_urls_from_pdf_folder(folder_path: str, output_file: str = "links.md"
     if not pdf_files:
         raise ValueError(f"No PDF files found in: {folder_path}")
 
+    job = current_job()
     pdf_urls_data = []
     all_unique_urls = set()
 
-    for pdf_file in tqdm(pdf_files, desc="Processing PDF files"):
+    for pdf_file in job.track(pdf_files, description="Processing PDF files"):
         try:
-            doc = fitz.open(pdf_file)
+            with job.stage("open"):
+                doc = fitz.open(pdf_file)
             pdf_urls = []
+            page_texts = PageTexts(doc, file_digest(pdf_file) if cache else None, cache)
 
-            for page_num in tqdm(range(len(doc)), desc=f"Pages in {pdf_file.name}", leave=False):
-                page = doc.load_page(page_num)
-                pdf_urls.extend(extract_urls_from_text(page.get_text()))
+            for page_num in job.track(range(len(doc)), description=f"Pages in {pdf_file.name}"):
+                pdf_urls.extend(extract_urls_from_text(page_texts.get(page_num)[0]))
+                job.count("pages")
 
+            page_texts.save()
             doc.close()
 
             if pdf_urls:
                 unique_pdf_urls = list(set(pdf_urls))
                 formatted_links = [
                     get_formatted_link(url)
-                    for url in tqdm(unique_pdf_urls, desc=f"Formatting URLs in {pdf_file.name}", leave=False)
+                    for url in job.track(unique_pdf_urls, description=f"Formatting URLs in {pdf_file.name}")
                 ]
 
                 for link in formatted_links:
@@ -162,7 +278,7 @@ def extract_urls_from_pdf_folder(folder_path: str, output_file: str = "links.md"
                 )
 
         except Exception as e:
-            tqdm.write(f"Warning: Could not process {pdf_file.name}: {str(e)}")
+            job.warn(f"Warning: Could not process {pdf_file.name}: {str(e)}")
 
     if not pdf_urls_data:
         raise ValueError("No URLs found in any PDF files")
@@ -200,7 +316,7 @@ def extract_urls_from_pdf_folder(folder_path: str, output_file: str = "links.md"
     markdown_content.extend([f"- {link}" for link in all_formatted_links])
 
     output_path = folder_path / output_file
-    with open(output_path, "w", encoding="utf-8") as f:
+    with job.stage("write"), open(output_path, "w", encoding="utf-8") as f:
         f.write("\n".join(markdown_content))
 
     return str(output_path)
@@ -0,0 +1,112 @@
+import hashlib
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import fitz
+
+from .jobs import current_job
+
+# Stream filters whose data is a complete image file (JPEG, JPEG 2000) and can be copied unchanged
+_RAW_FORMATS = {"/DCTDecode": "jpg", "/JPXDecode": "jp2"}
+
+
+def image_bytes(doc: fitz.Document, xref: int) -> Tuple[bytes, str]:
+    """Encoded image data and file extension for an image xref.
+
+    JPEG and JPEG 2000 streams are returned exactly as stored in the PDF. Other
+    streams (Flate, CCITT, ...) are not image files on their own, so PyMuPDF
+    exports them in a lossless format (usually PNG).
+    """
+    kind, value = doc.xref_get_key(xref, "Filter")
+    if kind == "name" and value in _RAW_FORMATS:
+        return doc.xref_stream_raw(xref), _RAW_FORMATS[value]
+
+    image = doc.extract_image(xref)
+    return image["image"], image["ext"]
+
+
+def extract_page_images(
+    doc: fitz.Document, output_dir: str, prefix: str = "img", min_size: int = 0
+) -> Dict[int, List[Path]]:
+    """Write the embedded images of an open document, each distinct image once.
+
+    Images drawn on several pages (logos, repeated figures) are recognised by xref
+    and by content hash, and written only the first time they appear.
+
+    Args:
+        doc: Open PyMuPDF document.
+        output_dir: Folder for the image files.
+        prefix: File name prefix, e.g. the PDF name.
+        min_size: Skip images whose width or height is below this many pixels (icons, rules).
+
+    Returns:
+        Mapping of zero-based page number to image paths, in reading order (top to bottom,
+        left to right). A deduplicated image is listed on every page that shows it.
+    """
+    job = current_job()
+    output_dir = Path(output_dir)
+    by_xref: Dict[int, Path] = {}
+    by_hash: Dict[str, Path] = {}
+    pages: Dict[int, List[Path]] = {}
+
+    for page_num in job.track(range(len(doc)), description="Extracting images"):
+        with job.stage("scan"):
+            infos = doc.load_page(page_num).get_image_info(xrefs=True)
+        placed = []
+        for info in sorted(infos, key=lambda info: (round(info["bbox"][1]), info["bbox"][0])):
+            xref = info["xref"]
+            # Inline images have no xref and can't be addressed without re-rendering
+            if xref == 0 or min(info["width"], info["height"]) < min_size:
+                continue
+
+            if xref not in by_xref:
+                with job.stage("extract"):
+                    data, ext = image_bytes(doc, xref)
+                digest = hashlib.sha256(data).hexdigest()
+                if digest in by_hash:
+                    job.count("duplicate_images")
+                else:
+                    path = output_dir / f"{prefix}-p{page_num + 1:03}-{len(by_hash) + 1:03}.{ext}"
+                    output_dir.mkdir(parents=True, exist_ok=True)
+                    with job.stage("write"):
+                        path.write_bytes(data)
+                    by_hash[digest] = path
+                    job.count("images")
+                by_xref[xref] = by_hash[digest]
+
+            if by_xref[xref] not in placed:
+                placed.append(by_xref[xref])
+        if placed:
+            pages[page_num] = placed
+
+    return pages
+
+
+def extract_images(pdf_path: str, output_dir: str = None, min_size: int = 0) -> Dict[int, List[Path]]:
+    """Extract the embedded images of a PDF without re-encoding them.
+
+    Args:
+        pdf_path: Path to the PDF file.
+        output_dir: Folder for the images (defaults to ``<pdf name>_images`` next to the PDF).
+        min_size: Skip images whose width or height is below this many pixels.
+
+    Returns:
+        Mapping of zero-based page number to image paths, in reading order.
+
+    Raises:
+        FileNotFoundError: If the PDF does not exist.
+    """
+    pdf_path = Path(pdf_path)
+    if not pdf_path.exists():
+        raise FileNotFoundError(f"PDF file not found: {pdf_path}")
+
+    job = current_job()
+    output_dir = Path(output_dir) if output_dir else pdf_path.with_name(f"{pdf_path.stem}_images")
+    with job.stage("open"):
+        doc = fitz.open(pdf_path)
+    pages = extract_page_images(doc, output_dir, prefix=pdf_path.stem, min_size=min_size)
+    doc.close()
+
+    written = len({path for paths in pages.values() for path in paths})
+    job.log(f"Extracted {written} images from {len(pages)} pages to {output_dir}")
+    return pages
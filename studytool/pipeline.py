@@ -0,0 +1,279 @@
+import contextvars
+import os
+import re
+from collections import deque
+from concurrent.futures import Executor, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from functools import partial
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, List, Optional
+
+import fitz
+
+from .cache import ArtifactCache, file_digest
+from .ebook import chapter_to_markdown, epub_to_chapters
+from .jobs import current_job
+from .link import get_formatted_link
+from .pdf2text import PageTexts, clean_pdf_text, extract_urls_from_text
+from .search import notify_written
+from .trad_to_simp import get_converter
+
+# The section ``write_markdown`` (and ``pdf_to_markdown``) appends, up to the next heading
+_URLS_SECTION_RE = re.compile(r"^## Extracted URLs[ \t]*\n.*?(?=^#{1,2} |\Z)", re.MULTILINE | re.DOTALL)
+
+
+@dataclass
+class Record:
+    """A unit of content flowing through a pipeline: one PDF page or one EPUB chapter."""
+
+    source: str
+    index: int
+    text: str
+    # Section heading added by the writer ("Page 3"); None when the text carries its own headings
+    heading: Optional[str] = None
+    # Raw URLs (e.g. PDF link annotations) and, after ``resolve_links``, their Markdown links
+    urls: List[str] = field(default_factory=list)
+    links: List[str] = field(default_factory=list)
+
+
+@dataclass
+class Stage:
+    """A named step that transforms one record; parallel stages run records on a thread pool."""
+
+    name: str
+    fn: Callable[[Record], Record]
+    parallel: bool = False
+
+    def __call__(self, record: Record) -> Record:
+        with current_job().stage(self.name):
+            return self.fn(record)
+
+
+def _parallel_map(fn: Callable, items: Iterable, workers: int) -> Iterator:
+    """Map ``fn`` over ``items`` on a thread pool, yielding results in order.
+
+    At most ``2 * workers`` items are in flight, so records keep streaming instead of
+    being collected up front, and each task runs in a copy of the caller's context so
+    it reports to the current job.
+    """
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        pending = deque()
+        for item in items:
+            pending.append(pool.submit(contextvars.copy_context().run, fn, item))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+class Pipeline:
+    """A chain of stages applied lazily to a stream of records.
+
+    Records are pulled through every stage one at a time, so nothing is written until
+    the caller consumes the result (``link_pool`` being a ``ThreadPoolExecutor``)::
+
+        pipeline = Pipeline().then("clean", clean).then("convert", to_simplified())
+        pipeline.then("links", partial(resolve_links, pool=link_pool), parallel=True)
+        write_markdown(pipeline.run(pdf_records("lecture.pdf")), "lecture.md", title="lecture")
+    """
+
+    def __init__(self, stages: Optional[List[Stage]] = None, workers: int = 8):
+        """Initialize"""
+        self.stages = list(stages or [])
+        self.workers = workers
+
+    def then(self, name: str, fn: Callable[[Record], Record], parallel: bool = False) -> "Pipeline":
+        """Append a stage and return the pipeline, so calls can be chained."""
+        self.stages.append(Stage(name, fn, parallel))
+        return self
+
+    def stream(self, records: Iterable[Record]) -> Iterator[Record]:
+        """Lazily apply every stage to ``records``."""
+        stream = iter(records)
+        for stage in self.stages:
+            stream = _parallel_map(stage, stream, self.workers) if stage.parallel else map(stage, stream)
+        return stream
+
+    def run(self, records: Iterable[Record], description: str = "Pipeline") -> List[Record]:
+        """Apply every stage to ``records`` and return the processed records in order."""
+        total = len(records) if hasattr(records, "__len__") else None
+        return list(current_job().track(self.stream(records), description=description, total=total))
+
+
+def pdf_records(pdf_path: str, cache: Optional[ArtifactCache] = None) -> Iterator[Record]:
+    """Yield one record per PDF page with its text layer and link annotation URIs."""
+    job = current_job()
+    with job.stage("open"):
+        doc = fitz.open(pdf_path)
+    page_texts = PageTexts(doc, file_digest(pdf_path) if cache else None, cache)
+    try:
+        for page_num in range(len(doc)):
+            text, links = page_texts.get(page_num)
+            job.count("pages")
+            yield Record(str(pdf_path), page_num, text, heading=f"Page {page_num + 1}", urls=list(links))
+        page_texts.save()
+    finally:
+        doc.close()
+
+
+def epub_records(epub_path: str) -> Iterator[Record]:
+    """Yield one record per EPUB chapter, already converted to Markdown."""
+    job = current_job()
+    for i, (title, html_content) in enumerate(epub_to_chapters(epub_path)):
+        with job.stage("extract"):
+            text = chapter_to_markdown(title, html_content)
+        job.count("chapters")
+        yield Record(str(epub_path), i, text)
+
+
+def markdown_records(path: str) -> Iterator[Record]:
+    """Yield a Markdown or text file as a single record."""
+    with current_job().stage("open"), open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+    yield Record(str(path), 0, text)
+
+
+def clean(record: Record) -> Record:
+    """Clean extracted PDF text (see ``clean_pdf_text``)."""
+    if record.text.strip():
+        record.text = clean_pdf_text(record.text)
+    return record
+
+
+def to_simplified(config: str = "t2s.json") -> Callable[[Record], Record]:
+    """Stage that converts a record's text and heading with OpenCC (Traditional to Simplified by default)."""
+    converter = get_converter(config)
+
+    def convert(record: Record) -> Record:
+        record.text = converter.convert(record.text)
+        if record.heading:
+            record.heading = converter.convert(record.heading)
+        return record
+
+    return convert
+
+
+def resolve_links(record: Record, pool: Optional[Executor] = None) -> Record:
+    """Collect the URLs in a record's text and annotations and format them as Markdown links.
+
+    An "Extracted URLs" section already in the text (from an earlier run on the same
+    Markdown) is removed and its URLs are resolved again, so re-running never adds a
+    second section. Titles are fetched through ``get_formatted_link``, whose cache makes
+    a URL repeated across records cost one request. With a ``pool`` the titles of one
+    record are fetched concurrently, which matters for a Markdown file read as a single
+    record; bind it with ``functools.partial`` and run the stage in parallel to also
+    overlap records.
+    """
+    for section in _URLS_SECTION_RE.findall(record.text):
+        record.urls.extend(extract_urls_from_text(section))
+    record.text = _URLS_SECTION_RE.sub("", record.text)
+
+    urls = dict.fromkeys(record.urls + extract_urls_from_text(record.text))
+    if pool is None:
+        record.links = [get_formatted_link(url) for url in urls]
+    else:
+        # Each lookup runs in a copy of this context so it reports to the current job
+        futures = [pool.submit(contextvars.copy_context().run, get_formatted_link, url) for url in urls]
+        record.links = [future.result() for future in futures]
+    current_job().count("urls", len(record.links))
+    return record
+
+
+def write_markdown(records: Iterable[Record], output_path: str, title: str = None, url_sort: str = "desc") -> str:
+    """Assemble records into one Markdown document and write it once.
+
+    Args:
+        records: Processed records, in document order. Records without text are skipped.
+        output_path: Output Markdown file.
+        title: Optional top-level heading.
+        url_sort: Sort order of the "Extracted URLs" section ("asc" or "desc"), written
+            when any record has resolved links.
+
+    Returns:
+        The Markdown content.
+    """
+    job = current_job()
+    content = [f"# {title}", ""] if title else []
+    links = {}
+    for record in records:
+        if record.text.strip():
+            if record.heading:
+                content.extend([f"## {record.heading}", ""])
+            content.extend([record.text.strip(), ""])
+        links.update(dict.fromkeys(record.links))
+
+    if links:
+        content.extend(["## Extracted URLs", ""])
+        content.extend(f"- {link}" for link in sorted(links, reverse=(url_sort.lower() != "asc")))
+        content.append("")
+
+    final_content = "\n".join(content)
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    with job.stage("write"), open(output_path, "w", encoding="utf-8") as f:
+        f.write(final_content)
+    notify_written(output_path)
+    return final_content
+
+
+def convert_file(
+    input_path: str,
+    output_path: str = None,
+    simplified: bool = False,
+    links: bool = False,
+    url_sort: str = "desc",
+    workers: int = 8,
+    cache: Optional[ArtifactCache] = None,
+) -> str:
+    """Convert a PDF, EPUB or Markdown file in one in-memory pass.
+
+    PDF pages are extracted and cleaned, EPUB chapters converted to Markdown, and
+    Markdown files read as they are; the records are then optionally converted to
+    Simplified Chinese and their URLs resolved to titled links before a single write.
+
+    A Markdown input is rewritten in place unless ``output_path`` is given; with
+    ``links`` its previous "Extracted URLs" section is replaced rather than repeated.
+
+    Args:
+        input_path: PDF, EPUB or Markdown/text file.
+        output_path: Output Markdown file (defaults to the input with a .md suffix, which
+            for Markdown input is the input itself).
+        simplified: Convert Traditional to Simplified Chinese with OpenCC.
+        links: Resolve URLs to Markdown links listed under "Extracted URLs".
+        url_sort: Sort order of the resolved links ("asc" or "desc").
+        workers: Threads for the link-resolving stage, and for the title lookups within a record.
+        cache: Optional artifact cache for PDF page text (see ``PageTexts``).
+
+    Returns:
+        The Markdown content.
+
+    Raises:
+        FileNotFoundError: If the input does not exist.
+    """
+    input_path = Path(input_path)
+    if not input_path.exists():
+        raise FileNotFoundError(f"File not found: {input_path}")
+
+    pipeline = Pipeline(workers=workers)
+    suffix = input_path.suffix.lower()
+    if suffix == ".pdf":
+        records, title = pdf_records(input_path, cache=cache), input_path.stem
+        pipeline.then("clean", clean)
+    elif suffix == ".epub":
+        records, title = epub_records(str(input_path)), None
+    else:
+        records, title = markdown_records(input_path), None
+
+    if simplified:
+        pipeline.then("convert", to_simplified())
+
+    output_path = output_path or input_path.with_suffix(".md")
+    # Title lookups get their own pool: the record threads block on them
+    with ThreadPoolExecutor(max_workers=workers) as link_pool:
+        if links:
+            pipeline.then("links", partial(resolve_links, pool=link_pool), parallel=True)
+        content = write_markdown(
+            pipeline.run(records, description=f"Processing {input_path.name}"), output_path, title, url_sort
+        )
+    current_job().log(f"Wrote {os.fspath(output_path)}")
+    return content
@@ -0,0 +1,262 @@
+import hashlib
+import os
+import re
+import sqlite3
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Iterator, List, Optional, Tuple
+
+from .jobs import current_job
+
+INDEX_NAME = ".stt-index.sqlite"
+
+# Markdown written by pdf2md ("## Page N"), ebook2md (one "# Chapter" per file) and course
+_SECTION_RE = re.compile(r"^(#{1,2}) +(.+?)\s*$", re.MULTILINE)
+
+
+@dataclass
+class SearchHit:
+    """A ranked search result."""
+
+    path: str
+    section: str
+    snippet: str
+    rank: float
+
+
+def split_sections(content: str) -> List[Tuple[str, str]]:
+    """Split Markdown into (section, body) records on level 1-2 headings.
+
+    Text before the first heading becomes a record with an empty section name.
+    """
+    records = []
+    matches = list(_SECTION_RE.finditer(content))
+    if not matches or matches[0].start() > 0:
+        preamble = content[: matches[0].start()] if matches else content
+        if preamble.strip():
+            records.append(("", preamble.strip()))
+
+    for i, match in enumerate(matches):
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(content)
+        records.append((match.group(2), content[match.end() : end].strip()))
+
+    return records
+
+
+def find_index(path: str) -> Optional[Path]:
+    """Return the index database in ``path`` or its nearest parent, if any."""
+    path = Path(path).resolve()
+    for folder in [path, *path.parents] if path.is_dir() else path.parents:
+        candidate = folder / INDEX_NAME
+        if candidate.exists():
+            return candidate
+    return None
+
+
+class SearchIndex:
+    """Incremental SQLite FTS5 index over a tree of Markdown files.
+
+    Files are keyed by their path relative to the index root and re-indexed only
+    when their content hash changes.
+    """
+
+    def __init__(self, root: str, trigram: bool = False):
+        """Initialize"""
+        self.root = Path(root).resolve()
+        self.db_path = self.root / INDEX_NAME
+        self.db = sqlite3.connect(self.db_path)
+        self.db.execute("PRAGMA journal_mode=WAL")
+        self.db.execute("PRAGMA synchronous=NORMAL")
+
+        # Trigram tokenizing matches substrings, which suits CJK text without word breaks
+        tokenizer = "trigram" if trigram else "unicode61 remove_diacritics 2"
+        with self.db:
+            self.db.execute("CREATE TABLE IF NOT EXISTS files (path TEXT PRIMARY KEY, hash TEXT, mtime REAL, size INT)")
+            self.db.execute(
+                f"CREATE VIRTUAL TABLE IF NOT EXISTS pages USING fts5(path UNINDEXED, section, body, tokenize='{tokenizer}')"
+            )
+
+    def close(self) -> None:
+        """Close the database."""
+        self.db.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _key(self, path: Path) -> str:
+        return path.resolve().relative_to(self.root).as_posix()
+
+    def index_file(self, path: str) -> bool:
+        """Index a single Markdown file if it is new or has changed.
+
+        Args:
+            path: Path to the Markdown file, inside the index root.
+
+        Returns:
+            True if the file was (re-)indexed, False if it was unchanged.
+        """
+        path = Path(path)
+        key = self._key(path)
+        stat = path.stat()
+
+        row = self.db.execute("SELECT hash, mtime, size FROM files WHERE path = ?", (key,)).fetchone()
+        if row and row[1] == stat.st_mtime and row[2] == stat.st_size:
+            return False
+
+        data = path.read_bytes()
+        digest = hashlib.sha1(data).hexdigest()
+        with self.db:
+            if row and row[0] == digest:
+                self.db.execute(
+                    "UPDATE files SET mtime = ?, size = ? WHERE path = ?", (stat.st_mtime, stat.st_size, key)
+                )
+                return False
+
+            self.db.execute("DELETE FROM pages WHERE path = ?", (key,))
+            self.db.executemany(
+                "INSERT INTO pages (path, section, body) VALUES (?, ?, ?)",
+                [(key, section, body) for section, body in split_sections(data.decode("utf-8", errors="replace"))],
+            )
+            self.db.execute(
+                "INSERT OR REPLACE INTO files (path, hash, mtime, size) VALUES (?, ?, ?, ?)",
+                (key, digest, stat.st_mtime, stat.st_size),
+            )
+        return True
+
+    def remove_file(self, key: str) -> None:
+        """Drop a file (by its index key) from the index."""
+        with self.db:
+            self.db.execute("DELETE FROM pages WHERE path = ?", (key,))
+            self.db.execute("DELETE FROM files WHERE path = ?", (key,))
+
+    def covers(self, path: str) -> bool:
+        """Whether ``path`` is one of the files ``markdown_files`` yields: Markdown, outside hidden directories."""
+        try:
+            parts = Path(self._key(Path(path))).parts
+        except ValueError:
+            return False
+        return parts[-1].endswith(".md") and not any(part.startswith(".") for part in parts[:-1])
+
+    def markdown_files(self) -> Iterator[Path]:
+        """Markdown files under the index root, skipping hidden directories."""
+        for folder, dirs, files in os.walk(self.root):
+            dirs[:] = [d for d in dirs if not d.startswith(".")]
+            for name in files:
+                if name.endswith(".md"):
+                    yield Path(folder) / name
+
+    def update(self) -> dict:
+        """Bring the index up to date with the files on disk.
+
+        Returns:
+            Counts of ``indexed``, ``unchanged`` and ``removed`` files.
+        """
+        stats = {"indexed": 0, "unchanged": 0, "removed": 0}
+        seen = set()
+        for path in self.markdown_files():
+            seen.add(self._key(path))
+            stats["indexed" if self.index_file(path) else "unchanged"] += 1
+
+        for (key,) in self.db.execute("SELECT path FROM files").fetchall():
+            if key not in seen:
+                self.remove_file(key)
+                stats["removed"] += 1
+
+        return stats
+
+    def search(self, query: str, limit: int = 10) -> List[SearchHit]:
+        """Return the best matching sections for an FTS5 query, best first.
+
+        Queries that aren't valid FTS5 syntax are retried as a plain AND of quoted terms.
+        An empty query matches nothing.
+        """
+        if not query.strip():
+            return []
+
+        sql = (
+            "SELECT path, section, snippet(pages, 2, '**', '**', '…', 16), bm25(pages, 0.0, 5.0, 1.0) AS rank "
+            "FROM pages WHERE pages MATCH ? ORDER BY rank LIMIT ?"
+        )
+        try:
+            rows = self.db.execute(sql, (query, limit)).fetchall()
+        except sqlite3.OperationalError:
+            quoted = " ".join('"' + term.replace('"', '""') + '"' for term in query.split())
+            rows = self.db.execute(sql, (quoted, limit)).fetchall()
+        return [SearchHit(*row) for row in rows]
+
+
+def notify_written(path: str) -> None:
+    """Update the index containing ``path``, if there is one.
+
+    Converters call this after writing Markdown so an existing index stays current
+    without a full rescan. It does nothing when no index has been created, or for files
+    a full ``stt index`` would skip (not Markdown, or in a hidden directory).
+    """
+    db_path = find_index(path)
+    if db_path is None:
+        return
+
+    try:
+        with SearchIndex(db_path.parent) as index:
+            if index.covers(path):
+                index.index_file(path)
+    except (sqlite3.Error, ValueError, OSError):
+        # Indexing is best effort; a stale index is refreshed by the next `stt index`
+        pass
+
+
+def build_index(folder: str, trigram: bool = False) -> dict:
+    """Create or update the index for ``folder`` and print a summary.
+
+    Args:
+        folder: Root of the Markdown tree.
+        trigram: If True, a new index uses the trigram tokenizer (substring matching, good for CJK).
+
+    Returns:
+        Counts of ``indexed``, ``unchanged`` and ``removed`` files.
+    """
+    job = current_job()
+    start = time.perf_counter()
+    with job.stage("index"), SearchIndex(folder, trigram=trigram) as index:
+        stats = index.update()
+        sections = index.db.execute("SELECT count(*) FROM pages").fetchone()[0]
+    job.log(
+        f"Indexed {stats['indexed']} files ({stats['unchanged']} unchanged, {stats['removed']} removed), "
+        f"{sections} sections in {time.perf_counter() - start:.2f}s"
+    )
+    return stats
+
+
+def search_index(query: str, folder: str = ".", limit: int = 10) -> List[SearchHit]:
+    """Search the index that covers ``folder`` and print ranked snippets.
+
+    Args:
+        query: FTS5 query (words, "phrases", prefix*, AND/OR/NOT).
+        folder: Folder inside the indexed tree.
+        limit: Maximum number of results.
+
+    Returns:
+        The ranked hits.
+
+    Raises:
+        FileNotFoundError: If no index covers ``folder``.
+    """
+    db_path = find_index(folder)
+    if db_path is None:
+        raise FileNotFoundError(f"No search index found for {folder}; run `stt index` first")
+
+    job = current_job()
+    start = time.perf_counter()
+    with job.stage("search"), SearchIndex(db_path.parent) as index:
+        hits = index.search(query, limit=limit)
+    elapsed = (time.perf_counter() - start) * 1000
+
+    for hit in hits:
+        location = f"{hit.path} › {hit.section}" if hit.section else hit.path
+        job.log(f"{location}\n    {' '.join(hit.snippet.split())}\n")
+    job.log(f"{len(hits)} results in {elapsed:.1f} ms")
+    return hits
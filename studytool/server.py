@@ -0,0 +1,260 @@
+import contextlib
+import io
+import json
+import os
+import socket
+import socketserver
+import stat
+import struct
+import sys
+import tempfile
+import threading
+from pathlib import Path
+from typing import List, Optional
+
+# Quick commands that editor hooks and scripts call constantly. Long-running
+# commands stay in-process so their progress output is streamed as usual.
+DAEMON_COMMANDS = {"imgpath", "link", "t2s"}
+
+
+def socket_path() -> Path:
+    """Path of the daemon's Unix socket.
+
+    Defaults to ``$XDG_RUNTIME_DIR/stt.sock``, or to a private ``stt-<uid>`` directory in
+    the temp dir when there is no runtime dir; ``$STT_SOCKET`` overrides both.
+    """
+    if os.environ.get("STT_SOCKET"):
+        return Path(os.environ["STT_SOCKET"])
+    if os.environ.get("XDG_RUNTIME_DIR"):
+        return Path(os.environ["XDG_RUNTIME_DIR"]) / "stt.sock"
+    return Path(tempfile.gettempdir()) / f"stt-{os.getuid()}" / "stt.sock"
+
+
+def _private_dir(path: Path) -> None:
+    """Create ``path`` as a 0700 directory, refusing one that another user owns or can write to."""
+    path.mkdir(mode=0o700, parents=True, exist_ok=True)
+    info = path.lstat()
+    if not stat.S_ISDIR(info.st_mode) or info.st_uid != os.getuid() or info.st_mode & 0o022:
+        raise PermissionError(f"Unsafe socket directory: {path} (must be owned by you and not writable by others)")
+
+
+def _owned_by_me(path: Path) -> bool:
+    """Whether the socket file exists and belongs to the current user."""
+    try:
+        return path.lstat().st_uid == os.getuid()
+    except OSError:
+        return False
+
+
+def _peer_is_me(client: socket.socket) -> bool:
+    """Whether the process on the other end of a connected socket runs as the current user.
+
+    Uses ``SO_PEERCRED`` where available (Linux); elsewhere the socket file owner check applies.
+    """
+    if not hasattr(socket, "SO_PEERCRED"):
+        return True
+    credentials = client.getsockopt(socket.SOL_SOCKET, socket.SO_PEERCRED, struct.calcsize("3i"))
+    _, uid, _ = struct.unpack("3i", credentials)
+    return uid == os.getuid()
+
+
+def warm_up() -> None:
+    """Import the backends and build the converters the daemon keeps warm."""
+    from .link import session
+    from .num_to_image_path import num2img_path  # noqa: F401
+    from .trad_to_simp import get_converter
+
+    get_converter()
+    session()
+
+
+def run_command(argv: List[str]) -> tuple:
+    """Run an ``stt`` command in this process and capture its output.
+
+    Args:
+        argv: Command line arguments, without the program name.
+
+    Returns:
+        Tuple of (stdout, stderr, exit_code).
+    """
+    from .main import app
+
+    stdout, stderr = io.StringIO(), io.StringIO()
+    exit_code = 0
+    with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+        try:
+            app(args=argv, prog_name="stt")
+        except SystemExit as e:
+            exit_code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+        except Exception as e:
+            print(f"Error: {e}", file=sys.stderr)
+            exit_code = 1
+
+    return stdout.getvalue(), stderr.getvalue(), exit_code
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    """Handle one JSON request per connection."""
+
+    def handle(self):
+        """Run the requested command and write back a JSON response."""
+        line = self.rfile.readline()
+        # Liveness probes (``is_running``) connect and hang up without a request
+        if not line or not _peer_is_me(self.request):
+            return
+        request = json.loads(line)
+
+        if request.get("shutdown"):
+            self._respond({"stdout": "", "stderr": "", "exit_code": 0})
+            threading.Thread(target=self.server.shutdown, daemon=True).start()
+            return
+
+        # Commands use relative paths and print to stdout, and both the working directory and
+        # the stdout redirection are process-wide, so requests run one at a time. Commands that
+        # can run long (``link --file``, ``imgpath --no-once``) are therefore never forwarded.
+        with self.server.lock:
+            previous = os.getcwd()
+            try:
+                os.chdir(request.get("cwd") or previous)
+                stdout, stderr, exit_code = run_command(request["argv"])
+            finally:
+                os.chdir(previous)
+
+        self._respond({"stdout": stdout, "stderr": stderr, "exit_code": exit_code})
+
+    def _respond(self, response: dict) -> None:
+        self.wfile.write((json.dumps(response) + "\n").encode("utf-8"))
+
+
+class StudyToolServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    """Long-running ``stt`` server listening on a Unix socket."""
+
+    daemon_threads = True
+
+    def __init__(self, path: Path):
+        """Initialize"""
+        self.path = Path(path)
+        self.lock = threading.Lock()
+        _private_dir(self.path.parent)
+        if self.path.exists() or self.path.is_symlink():
+            self.path.unlink()
+        # Create the socket 0600 from the start instead of tightening it after bind
+        umask = os.umask(0o177)
+        try:
+            super().__init__(str(self.path), _Handler)
+        finally:
+            os.umask(umask)
+
+    def server_close(self):
+        """Close the socket and remove the socket file."""
+        super().server_close()
+        with contextlib.suppress(FileNotFoundError):
+            self.path.unlink()
+
+
+def serve(path: Optional[str] = None) -> None:
+    """Warm up the backends and serve ``stt`` commands until stopped.
+
+    Args:
+        path: Socket path; defaults to ``socket_path()``.
+    """
+    path = Path(path) if path else socket_path()
+    if is_running(path):
+        print(f"Error: stt server already running on {path}")
+        return
+
+    warm_up()
+    try:
+        server = StudyToolServer(path)
+    except OSError as e:
+        print(f"Error: cannot listen on {path}: {e}")
+        return
+    with server:
+        print(f"stt server listening on {path}")
+        try:
+            server.serve_forever()
+        except KeyboardInterrupt:
+            pass
+    print("stt server stopped")
+
+
+def _request(payload: dict, path: Path, timeout: Optional[float] = None) -> Optional[dict]:
+    """Send one request to the server; returns None if no server of this user is reachable."""
+    if not hasattr(socket, "AF_UNIX") or not _owned_by_me(path):
+        return None
+
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.settimeout(0.5)
+            client.connect(str(path))
+            if not _peer_is_me(client):
+                return None
+            client.settimeout(timeout)
+            client.sendall((json.dumps(payload) + "\n").encode("utf-8"))
+            with client.makefile("rb") as response:
+                return json.loads(response.readline())
+    except (OSError, ValueError):
+        return None
+
+
+def is_running(path: Optional[Path] = None) -> bool:
+    """Check whether a server is accepting connections on the socket."""
+    path = Path(path) if path else socket_path()
+    if not hasattr(socket, "AF_UNIX") or not _owned_by_me(path):
+        return False
+
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.settimeout(0.5)
+            client.connect(str(path))
+            return _peer_is_me(client)
+    except OSError:
+        return False
+
+
+def stop(path: Optional[str] = None) -> bool:
+    """Ask a running server to shut down; returns False if none was running."""
+    return _request({"shutdown": True}, Path(path) if path else socket_path(), timeout=5) is not None
+
+
+def forward(argv: List[str]) -> Optional[int]:
+    """Run a command on the server if one is running.
+
+    Args:
+        argv: Command line arguments, without the program name.
+
+    Returns:
+        The command's exit code, or None if it should run in-process instead.
+    """
+    if not argv or argv[0] not in DAEMON_COMMANDS or os.environ.get("STT_NO_DAEMON"):
+        return None
+    # Continuous monitoring never returns and batch link lookups can take minutes; either
+    # would hold the server's lock and stall every other forwarded call
+    if argv[0] == "imgpath" and "--no-once" in argv:
+        return None
+    if argv[0] == "link" and any(arg == "--file" or arg.startswith("--file=") for arg in argv):
+        return None
+
+    response = _request({"argv": argv, "cwd": os.getcwd()}, socket_path())
+    if response is None:
+        return None
+
+    sys.stdout.write(response["stdout"])
+    sys.stderr.write(response["stderr"])
+    return response["exit_code"]
+
+
+def main() -> None:
+    """Entry point for the ``stt`` script.
+
+    Passes the command to the server when one is running; otherwise, or for commands the
+    server doesn't handle, runs it in-process. Typer and the backends are only imported
+    on the in-process path, which keeps forwarded calls fast.
+    """
+    exit_code = forward(sys.argv[1:])
+    if exit_code is None:
+        from .main import app
+
+        app(prog_name="stt")
+    else:
+        sys.exit(exit_code)
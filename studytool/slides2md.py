@@ -1,15 +1,156 @@
 import glob
+import hashlib
+import html
+import io
+import math
 import os
+from collections import Counter
 from pathlib import Path
+from typing import Dict, List, Optional, Tuple
 
+import fitz
 from pdf2image import convert_from_path
-from rich.progress import track
+from PIL import Image, ImageChops
+
+from .cache import ArtifactCache, file_digest
+from .jobs import current_job
+from .pdf2text import PageTexts
+from .search import notify_written
+
+
+def build_thumbnail(image: Image.Image, width: int = 512) -> Image.Image:
+    """Grayscale copy of a page for build detection, large enough that different lines of text differ."""
+    height = max(1, round(image.height * width / image.width))
+    return image.convert("L").resize((width, height), Image.BILINEAR)
+
+
+def build_similarity(earlier: Image.Image, later: Image.Image, tolerance: int = 48) -> float:
+    """Fraction of the earlier page's ink that is unchanged on the later page.
+
+    Ink is every pixel that differs from the page background (its most common grey
+    level). An animation build only adds content on top of the background, so it keeps
+    all of the previous page's ink pixel for pixel; a new slide on the same template
+    replaces its text and keeps little more than the shared layout.
+
+    Args:
+        earlier: Thumbnail of the earlier page (see ``build_thumbnail``).
+        later: Thumbnail of the later page.
+        tolerance: Grey-level difference below which two pixels count as the same.
+    """
+    if earlier.size != later.size:
+        return 0.0
+    histogram = earlier.histogram()
+    background = histogram.index(max(histogram))
+    ink = earlier.point(lambda p: 255 if abs(p - background) > tolerance else 0)
+    changed = ImageChops.difference(earlier, later).point(lambda p: 255 if p > tolerance else 0)
+    ink_pixels = ink.histogram()[255]
+    if not ink_pixels:
+        return 1.0
+    return 1 - ImageChops.darker(ink, changed).histogram()[255] / ink_pixels
+
+
+def text_contained(earlier: str, later: str) -> bool:
+    """Whether every non-empty line of the earlier page's text is still on the later page."""
+    remaining = Counter(line.strip() for line in later.splitlines() if line.strip())
+    remaining.subtract(line.strip() for line in earlier.splitlines() if line.strip())
+    return all(count >= 0 for count in remaining.values())
+
+
+def dedupe_builds(
+    images: List[Image.Image], threshold: float = 0.98, texts: Optional[List[Optional[str]]] = None
+) -> List[Tuple[int, Image.Image]]:
+    """Collapse runs of animation builds to the last page of each run.
+
+    A page is a build of the previous one when it keeps at least ``threshold`` of the
+    previous page's ink (see ``build_similarity``) and, where both pages have a text
+    layer, all of the previous page's lines of text.
+
+    Args:
+        images: Rendered pages in order.
+        threshold: Minimum ``build_similarity`` for two consecutive pages to count as builds of one slide.
+        texts: Optional text layer of each page, in the same order.
+
+    Returns:
+        (page index, image) pairs of the pages to keep.
+    """
+    kept = []
+    previous = None
+    for i, image in enumerate(images):
+        thumbnail = build_thumbnail(image)
+        is_build = kept and build_similarity(previous, thumbnail) >= threshold
+        if is_build and texts and texts[i - 1] and texts[i]:
+            is_build = text_contained(texts[i - 1], texts[i])
+        if is_build:
+            # Later builds add content, so the final page of a run replaces the earlier ones
+            kept[-1] = (i, image)
+        else:
+            kept.append((i, image))
+        previous = thumbnail
+    return kept
+
+
+def page_digest(doc: fitz.Document, page_num: int, memo: Optional[Dict[int, bytes]] = None) -> str:
+    """Content hash of a page: its drawing commands, size and the data of the resources it uses.
+
+    Resources (images, embedded fonts, form XObjects) are hashed by content rather than
+    by xref number, so an unchanged slide hashes the same after other slides are edited,
+    added or removed, and in a different deck the slide was merged into. Resources nested
+    inside form XObjects are not followed.
+
+    Args:
+        doc: Open document.
+        page_num: Zero-based page number.
+        memo: Optional per-document memo of resource hashes by xref, shared across pages.
+    """
+    memo = {} if memo is None else memo
+    page = doc.load_page(page_num)
+    digest = hashlib.sha256()
+    digest.update(f"{page.rect}|{page.rotation}|".encode())
+    digest.update(page.read_contents())
+
+    resources = [(f"img{name}", xref) for xref, *_, name, _, _ in page.get_images(full=True)]
+    resources += [(f"form{name}", xref) for xref, name, *_ in page.get_xobjects()]
+    for name, xref in sorted(resources):
+        if xref not in memo:
+            memo[xref] = hashlib.sha256(doc.xref_stream_raw(xref) or b"").digest()
+        digest.update(name.encode() + memo[xref])
+
+    # Font dicts only point at their font program, so the base font name and the embedded program are hashed
+    for xref, _, _, basefont, name, *_ in sorted(page.get_fonts(full=True), key=lambda font: font[4]):
+        if xref not in memo:
+            memo[xref] = hashlib.sha256(doc.extract_font(xref)[3] if xref else b"").digest()
+        digest.update(f"font{name}|{basefont}".encode() + memo[xref])
+    return digest.hexdigest()
+
+
+def page_runs(page_numbers: List[int]) -> List[Tuple[int, int]]:
+    """Group sorted page numbers into (first, last) runs of consecutive pages."""
+    runs = []
+    for page_num in page_numbers:
+        if runs and runs[-1][1] == page_num - 1:
+            runs[-1] = (runs[-1][0], page_num)
+        else:
+            runs.append((page_num, page_num))
+    return runs
 
 
 class Slide2md:
     """Convert slides to markdown."""
 
-    def __init__(self, course_folder: str, dpi: int = 100):
+    def __init__(
+        self,
+        course_folder: str,
+        dpi: int = 100,
+        dedupe: bool = False,
+        dedupe_threshold: float = 0.98,
+        responsive: bool = False,
+        thumbnail_widths: Tuple[int, ...] = (480, 960),
+        extract_text: bool = False,
+        cache: Optional[ArtifactCache] = None,
+        target_width: Optional[int] = None,
+        pixel_budget: Optional[int] = None,
+        max_deck_pixels: Optional[int] = None,
+    ):
         """Initialize"""
         self.course_folder = Path(course_folder)
         self.slides_folder = os.path.join(self.course_folder, "slides")
@@ -17,6 +158,19 @@ class Slide2md:
         self.imgs_folder = os.path.join(self.docs_folder, "imgs")
         self.index_file = os.path.join(self.docs_folder, "README.md")
         self.dpi = dpi
+        self.dedupe = dedupe
+        self.dedupe_threshold = dedupe_threshold
+        self.responsive = responsive
+        self.thumbnail_widths = sorted(thumbnail_widths)
+        self.extract_text = extract_text
+        # pdf_name -> image name -> (text, link URIs), filled while rendering with extract_text
+        self.page_text: Dict[str, Dict[str, Tuple[str, List[str]]]] = {}
+        self.cache = cache
+        # Adaptive rasterization: size each page from its own dimensions instead of a fixed dpi
+        self.target_width = target_width
+        self.pixel_budget = pixel_budget
+        self.max_deck_pixels = max_deck_pixels
+        self.adaptive = bool(target_width or pixel_budget or max_deck_pixels)
 
         for folder in [self.imgs_folder, self.docs_folder]:
             os.makedirs(folder, exist_ok=True)
@@ -26,27 +180,216 @@ class Slide2md:
                 f.write("Course Index" + "\n" + "===" + "\n\n")
                 f.close()
 
+    def page_zooms(self, doc: fitz.Document) -> List[float]:
+        """Render scale (pixels per point) of every page.
+
+        Pages are scaled to ``target_width`` pixels wide, or to ``pixel_budget`` pixels in
+        total, from their own size, so oversized poster pages and small pages come out at
+        a similar displayed quality; otherwise ``dpi`` applies. With ``max_deck_pixels``
+        all pages are scaled down together until the deck fits.
+        """
+        zooms = []
+        for page in doc:
+            rect = page.rect
+            if self.target_width:
+                zooms.append(self.target_width / rect.width)
+            elif self.pixel_budget:
+                zooms.append(math.sqrt(self.pixel_budget / (rect.width * rect.height)))
+            else:
+                zooms.append(self.dpi / 72)
+
+        total = sum(zoom * zoom * page.rect.width * page.rect.height for zoom, page in zip(zooms, doc))
+        if self.max_deck_pixels and total > self.max_deck_pixels:
+            factor = math.sqrt(self.max_deck_pixels / total)
+            zooms = [zoom * factor for zoom in zooms]
+        return zooms
+
+    def render_page(self, doc: fitz.Document, page_num: int, zoom: float = None) -> Image.Image:
+        """Render one page with PyMuPDF, at ``zoom`` pixels per point or else at ``dpi``."""
+        with current_job().stage("render"):
+            page = doc.load_page(page_num)
+            if zoom is None:
+                pixmap = page.get_pixmap(dpi=self.dpi, alpha=False)
+            else:
+                pixmap = page.get_pixmap(matrix=fitz.Matrix(zoom, zoom), alpha=False)
+            return Image.frombytes("RGB", (pixmap.width, pixmap.height), pixmap.samples)
+
+    def render_pages(
+        self, pdf_path
+    ) -> Tuple[List[Image.Image], Optional[list], List[Optional[bytes]], List[Optional[str]]]:
+        """Render every page of a PDF, using the artifact cache when one is configured.
+
+        With ``extract_text`` the PDF is opened once with PyMuPDF, which renders each page
+        and pulls its text layer and link URIs in the same pass. Adaptive sizes (see
+        ``page_zooms``) are also rendered with PyMuPDF; otherwise poppler renders.
+
+        Rendered images are keyed by each page's content hash (``page_digest``) plus the
+        render settings, so edits to one slide don't invalidate the rest of the deck.
+
+        Returns:
+            Page images, (text, links) per page (None without ``extract_text``), the
+            encoded JPEG per page where it is already available from the cache, and the
+            cache key per page that was rendered now and still has to be stored.
+        """
+        job = current_job()
+        use_fitz = self.extract_text or self.adaptive
+        if self.cache is None and not use_fitz:
+            with job.stage("render"):
+                images = convert_from_path(pdf_path=pdf_path, dpi=self.dpi)
+            return images, None, [None] * len(images), [None] * len(images)
+
+        digest = file_digest(pdf_path) if self.cache and self.extract_text else None
+        with job.stage("open"):
+            doc = fitz.open(pdf_path)
+        images, encoded = [None] * len(doc), [None] * len(doc)
+        texts = [None] * len(doc) if self.extract_text else None
+        page_texts = PageTexts(doc, digest, self.cache) if self.extract_text else None
+        zooms = self.page_zooms(doc) if self.adaptive else [None] * len(doc)
+        # Render settings that go into each page's cache key
+        settings = [f"fitz|{zoom:.4f}" if zoom else f"fitz|{self.dpi}" for zoom in zooms]
+        if not use_fitz:
+            settings = [f"poppler|{self.dpi}"] * len(doc)
+
+        missing, keys, memo = [], [None] * len(doc), {}
+        for page_num in range(len(doc)):
+            if self.extract_text:
+                texts[page_num] = page_texts.get(page_num)
+            data = None
+            if self.cache:
+                with job.stage("hash"):
+                    keys[page_num] = ArtifactCache.key(page_digest(doc, page_num, memo), "jpg", settings[page_num])
+                data = self.cache.get(keys[page_num])
+            if data is None:
+                missing.append(page_num)
+            else:
+                images[page_num], encoded[page_num], keys[page_num] = Image.open(io.BytesIO(data)), data, None
+        if page_texts:
+            page_texts.save()
+
+        if use_fitz:
+            for page_num in missing:
+                images[page_num] = self.render_page(doc, page_num, zooms[page_num])
+        else:
+            # Poppler renders contiguous runs of uncached pages in one call each
+            for first, last in page_runs(missing):
+                with job.stage("render"):
+                    rendered = convert_from_path(
+                        pdf_path=pdf_path, dpi=self.dpi, first_page=first + 1, last_page=last + 1
+                    )
+                images[first : last + 1] = rendered
+        doc.close()
+
+        return images, texts, encoded, keys
+
     def pdf_to_image(self, pdf_path) -> None:
         """Convert PDF to images"""
-        images = convert_from_path(pdf_path=pdf_path, dpi=self.dpi)
+        job = current_job()
+        images, texts, encoded, keys = self.render_pages(pdf_path)
         pdf_name = os.path.basename(pdf_path).rsplit(".")[0]
-        for i, image in track(enumerate(images), description=f"Converting {pdf_name}", total=len(images)):
+
+        pages = list(enumerate(images))
+        if self.dedupe:
+            with job.stage("dedupe"):
+                pages = dedupe_builds(
+                    images, threshold=self.dedupe_threshold, texts=[text for text, _ in texts] if texts else None
+                )
+            job.count("duplicate_pages", len(images) - len(pages))
+
+        # Images keep their PDF page number, so gaps mark collapsed builds
+        for i, image in job.track(pages, description=f"Converting {pdf_name}"):
             image_path = os.path.join(self.imgs_folder, pdf_name, f"{i + 1:03}.jpg")
-            image.save(fp=image_path)
+            if encoded[i] is None and keys[i] is not None:
+                # Encoded once for both the cache and the output, and only for pages kept after dedupe
+                with job.stage("encode"):
+                    buffer = io.BytesIO()
+                    image.save(buffer, format="JPEG")
+                    encoded[i] = buffer.getvalue()
+                self.cache.put(keys[i], encoded[i])
+            with job.stage("write"):
+                if encoded[i] is not None:
+                    # Already a JPEG, so it is written without re-encoding
+                    with open(image_path, "wb") as f:
+                        f.write(encoded[i])
+                else:
+                    image.save(fp=image_path)
+            if texts:
+                self.page_text.setdefault(pdf_name, {})[f"{i + 1:03}.jpg"] = texts[i]
+            if self.responsive:
+                with job.stage("thumbnails"):
+                    self.save_thumbnails(image, pdf_name, f"{i + 1:03}.jpg")
+            job.count("pages")
+            job.count("pixels", image.width * image.height)
+
+    def save_thumbnails(self, image: Image.Image, pdf_name: str, image_name: str) -> None:
+        """Save downscaled copies of a rendered page to ``imgs/<pdf_name>/w<width>/``."""
+        for width in self.thumbnail_widths:
+            if width >= image.width:
+                continue
+            folder = os.path.join(self.imgs_folder, pdf_name, f"w{width}")
+            os.makedirs(folder, exist_ok=True)
+            height = round(image.height * width / image.width)
+            image.resize((width, height), Image.BILINEAR, reducing_gap=2.0).save(fp=os.path.join(folder, image_name))
+
+    def image_markup(self, pdf_name: str, image: str, lazy: bool = True, alt: str = None) -> str:
+        """HTML ``<img>`` for a page with width/height, a thumbnail srcset and lazy loading."""
+        image_directory = os.path.join(self.imgs_folder, pdf_name)
+        with Image.open(os.path.join(image_directory, image)) as full:
+            width, height = full.size
+
+        src = "/".join(["imgs", pdf_name, image])
+        srcset = [
+            f"imgs/{pdf_name}/w{w}/{image} {w}w"
+            for w in self.thumbnail_widths
+            if os.path.exists(os.path.join(image_directory, f"w{w}", image))
+        ]
+        srcset.append(f"{src} {width}w")
+        # Pages are shown at most as wide as the largest thumbnail; narrower screens pick smaller files
+        display = min([width, *self.thumbnail_widths[-1:]])
+        return (
+            f'<img src="{src}" srcset="{", ".join(srcset)}" sizes="(max-width: {display}px) 100vw, {display}px" '
+            f'width="{width}" height="{height}" loading="{"lazy" if lazy else "eager"}" '
+            f'alt="{html.escape(alt or os.path.splitext(image)[0])}">\n'
+        )
+
+    @staticmethod
+    def text_block(text: str, links: List[str]) -> str:
+        """Collapsible HTML block with a slide's text and links."""
+        lines = [html.escape(line.strip()) for line in text.splitlines() if line.strip()]
+        block = "<details><summary>Slide text</summary>\n"
+        if lines:
+            block += "<p>" + "<br>\n".join(lines) + "</p>\n"
+        if links:
+            items = "".join(f'<li><a href="{html.escape(uri)}">{html.escape(uri)}</a></li>' for uri in links)
+            block += f"<ul>{items}</ul>\n"
+        return block + "</details>\n"
 
     def create_md(self, pdf_name: str) -> None:
         """Create a markdown file for the given PDF"""
         image_directory = os.path.join(self.imgs_folder, pdf_name)
-        images = sorted([file for file in os.listdir(image_directory)])
-        markdown_images = [
-            f"![{os.path.splitext(image)[0]}]({os.path.join('imgs', pdf_name, image)})\n" for image in images
-        ]
+        images = sorted([file for file in os.listdir(image_directory) if file.endswith(".jpg")])
+        page_text = self.page_text.get(pdf_name, {})
+
+        markdown_images = []
+        for i, image in enumerate(images):
+            text, links = page_text.get(image, ("", []))
+            # The slide title (first line of its text) makes a better alt text than the page number
+            alt = next((line.strip() for line in text.splitlines() if line.strip()), "")[:100]
+            if self.responsive:
+                # The first slide is above the fold, so only later ones are loaded lazily
+                markdown_image = self.image_markup(pdf_name, image, lazy=i > 0, alt=alt or None)
+            else:
+                alt = alt.replace("[", "(").replace("]", ")") or os.path.splitext(image)[0]
+                markdown_image = f"![{alt}]({os.path.join('imgs', pdf_name, image)})\n"
+            if text.strip() or links:
+                markdown_image += "\n" + self.text_block(text, links)
+            markdown_images.append(markdown_image)
         markdown_path = os.path.join(self.docs_folder, f"{pdf_name}.md")
 
-        with open(markdown_path, "w") as f:
+        with current_job().stage("write"), open(markdown_path, "w") as f:
             f.write(pdf_name + "\n" + "===" + "\n\n")
             f.write("\n".join(markdown_images))
             f.close()
+        notify_written(markdown_path)
 
     def update_index_yaml(self):
         """Update the index.yaml file"""
@@ -55,7 +398,9 @@ class Slide2md:
         markdown_files = glob.glob(os.path.join(self.docs_folder, "*.md"))
         markdown_files = sorted([f for f in markdown_files if os.path.basename(f) != "README.md"])
         with open(self.index_yaml, "w") as f:
-            f.write(f"site_name: {course_name}\n\n")
+            f.write(f"site_name: {course_name}\n")
+            # Pages stay at lec01.html rather than lec01/, so the raw <img> paths from image_markup resolve
+            f.write("use_directory_urls: false\n\n")
             f.write("nav:\n")
             f.write("   - Home: README.md\n")
             for markdown_file in markdown_files:
@@ -80,7 +425,7 @@ class Slide2md:
 
         # Convert the PDFs
         if pdfs_not_converted == []:
-            print("All slides converted!")
+            current_job().log("All slides converted!")
 
         else:
             for pdf in sorted(pdfs_not_converted):
@@ -92,4 +437,7 @@ class Slide2md:
                 self.create_md(pdf_name=pdf_name)
 
             self.update_index_yaml()
-            print("Done!")
+            if self.cache:
+                self.cache.evict()
+                current_job().log(self.cache.summary())
+            current_job().log("Done!")
@@ -1,5 +1,16 @@
+from functools import lru_cache
+
 from opencc import OpenCC
 
+from .jobs import current_job
+from .search import notify_written
+
+
+@lru_cache(maxsize=None)
+def get_converter(config: str = "t2s.json") -> OpenCC:
+    """Return a cached OpenCC converter; building the dictionaries is the slow part."""
+    return OpenCC(config)
+
 
 def convert_trad_to_simp(file_path: str):
     """
@@ -9,17 +20,20 @@ def convert_trad_to_simp(file_path: str):
     Args:
         file_path (str): The path to the Markdown or text file.
     """
+    job = current_job()
     try:
-        converter = OpenCC("t2s.json")  # t2s.json for Traditional to Simplified
-        with open(file_path, "r", encoding="utf-8") as file:
+        converter = get_converter("t2s.json")  # t2s.json for Traditional to Simplified
+        with job.stage("open"), open(file_path, "r", encoding="utf-8") as file:
             traditional_content = file.read()
 
-        simplified_content = converter.convert(traditional_content)
+        with job.stage("convert"):
+            simplified_content = converter.convert(traditional_content)
 
-        with open(file_path, "w", encoding="utf-8") as file:
+        with job.stage("write"), open(file_path, "w", encoding="utf-8") as file:
             file.write(simplified_content)
-        print(f"Successfully converted '{file_path}' to Simplified Chinese.")
+        notify_written(file_path)
+        job.log(f"Successfully converted '{file_path}' to Simplified Chinese.")
     except FileNotFoundError:
-        print(f"Error: File not found at '{file_path}'.")
+        job.log(f"Error: File not found at '{file_path}'.")
     except Exception as e:
-        print(f"An error occurred: {e}")
+        job.log(f"An error occurred: {e}")
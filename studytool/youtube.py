@@ -1,24 +1,269 @@
-from pytube import YouTube
+import os
+import queue
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Iterable, List, Optional
 
+import yt_dlp
 
-def download_youtube_video(url, output_path):
-    try:
-        yt = YouTube(url)
-        video = yt.streams.filter(progressive=True, file_extension="mp3").first()
-        if video:
-            print(f"Downloading '{yt.title}'...")
-            video.download(output_path)
-            print("Download complete!")
-        else:
-            print("Couldn't find a video to download.")
-    except Exception as e:
-        print(f"An error occurred: {str(e)}")
+from .jobs import current_job
+
+
+@dataclass
+class DownloadResult:
+    """Outcome of a single queued download."""
+
+    url: str
+    status: str = "pending"
+    title: str = ""
+    filename: Optional[str] = None
+    bytes: int = 0
+    resumed_bytes: int = 0
+    elapsed: float = 0.0
+    error: Optional[str] = None
+
+    @property
+    def speed(self) -> float:
+        """Bytes per second transferred by this download (resumed bytes excluded)."""
+        return (self.bytes - self.resumed_bytes) / self.elapsed if self.elapsed > 0 else 0.0
+
+
+@dataclass
+class DownloadStats:
+    """Aggregate throughput over a run of the download manager."""
+
+    results: List[DownloadResult] = field(default_factory=list)
+    elapsed: float = 0.0
+
+    def count(self, status: str) -> int:
+        """Number of results with the given status."""
+        return sum(1 for result in self.results if result.status == status)
+
+    @property
+    def bytes(self) -> int:
+        """Bytes transferred over the network during the run."""
+        return sum(result.bytes - result.resumed_bytes for result in self.results if result.status == "finished")
+
+    @property
+    def throughput(self) -> float:
+        """Aggregate bytes per second over the wall-clock duration of the run."""
+        return self.bytes / self.elapsed if self.elapsed > 0 else 0.0
+
+    def summary(self) -> str:
+        """One-line human readable summary of the run."""
+        return (
+            f"{self.count('finished')} downloaded, {self.count('skipped')} skipped, {self.count('error')} failed | "
+            f"{self.bytes / 1e6:.1f} MB in {self.elapsed:.1f}s ({self.throughput / 1e6:.2f} MB/s)"
+        )
+
+
+class DownloadManager:
+    """Concurrent, resumable video downloader built on yt-dlp.
+
+    URLs are fed to a pool of worker threads, which also expand playlists into one queue
+    item per video. Partial ``.part`` files are resumed on the next run, and completed
+    items are recorded in a download archive so they are skipped afterwards.
+    """
+
+    def __init__(
+        self,
+        output_dir: str = "./",
+        workers: int = 4,
+        archive: Optional[str] = "downloads.txt",
+        format: str = "best",
+        audio_only: bool = False,
+        quiet: bool = True,
+    ):
+        """Initialize"""
+        self.output_dir = output_dir
+        self.workers = max(1, workers)
+        self.archive = os.path.join(output_dir, archive) if archive and not os.path.isabs(archive) else archive
+        self.format = "bestaudio/best" if audio_only else format
+        self.quiet = quiet
+        self._queue: "queue.Queue[DownloadResult]" = queue.Queue()
+        self._seen = set()
+        self._lock = threading.Lock()
+
+        os.makedirs(self.output_dir, exist_ok=True)
+
+    def ydl_opts(self, **extra) -> dict:
+        """Options shared by every YoutubeDL instance the manager creates."""
+        opts = {
+            "quiet": self.quiet,
+            "no_warnings": self.quiet,
+            "noprogress": True,
+            "format": self.format,
+            "outtmpl": os.path.join(self.output_dir, "%(title)s [%(id)s].%(ext)s"),
+            "continuedl": True,
+            "nopart": False,
+            "retries": 10,
+            "fragment_retries": 10,
+        }
+        if self.archive:
+            opts["download_archive"] = self.archive
+        opts.update(extra)
+        return opts
+
+    def add(self, url: str, expand: bool = True) -> bool:
+        """Queue a URL for download.
+
+        Args:
+            url: Video or playlist URL.
+            expand: If True, a playlist is split into one queue item per video by the worker that picks it up.
+
+        Returns:
+            True if the URL was new and queued.
+        """
+        with self._lock:
+            if not url or url in self._seen:
+                return False
+            self._seen.add(url)
+        self._queue.put((DownloadResult(url=url), expand))
+        return True
+
+    def extend(self, urls: Iterable[str], expand: bool = True) -> int:
+        """Queue several URLs; returns the number of new items queued."""
+        return sum(self.add(url, expand=expand) for url in urls)
 
+    def download_one(self, result: DownloadResult, expand: bool = True) -> Optional[DownloadResult]:
+        """Download a single queued item, filling in ``result`` in place.
 
-# Replace 'URL_HERE' with the URL of the YouTube video you want to download
-video_url = "https://youtu.be/ABy95341Dto"
+        The URL's metadata is extracted once and reused for the archive check and the
+        download. Playlists (with ``expand``) are queued as one item per video instead.
 
-# Replace 'YOUR_OUTPUT_PATH' with the directory where you want to save the video
-output_directory = "./"
+        Returns:
+            The result, or None if the URL was a playlist that was expanded.
+        """
+
+        def hook(progress: dict) -> None:
+            if progress["status"] in ("downloading", "finished"):
+                result.filename = result.filename or progress.get("filename")
+                result.bytes = progress.get("downloaded_bytes") or progress.get("total_bytes") or result.bytes
+
+        start = time.perf_counter()
+        try:
+            with yt_dlp.YoutubeDL(self.ydl_opts(progress_hooks=[hook], extract_flat="in_playlist")) as ydl:
+                info = ydl.extract_info(result.url, download=False, process=False)
+                if expand and info and info.get("_type") == "playlist":
+                    for entry in info.get("entries") or []:
+                        if entry:
+                            self.add(entry.get("url") or entry.get("webpage_url"), expand=False)
+                    return None
+
+                result.title = info.get("title", "")
+                if self.archive and ydl.in_download_archive(info):
+                    result.status = "skipped"
+                    return result
+
+                ydl.add_post_processor(_ResumeProbe(result), when="before_dl")
+                ydl.process_ie_result(info, download=True)
+                result.status = "finished"
+        except Exception as e:
+            result.status = "error"
+            result.error = str(e)
+        finally:
+            result.elapsed = time.perf_counter() - start
+
+        return result
+
+    def _worker(self, results: List[DownloadResult], on_result) -> None:
+        while True:
+            item = self._queue.get()
+            if item is None:
+                return
+
+            result = self.download_one(*item)
+            if result is not None:
+                with self._lock:
+                    results.append(result)
+                    if on_result:
+                        on_result(result)
+            self._queue.task_done()
+
+    def run(self, on_result=None) -> DownloadStats:
+        """Drain the queue with a pool of worker threads.
+
+        Workers expand playlists themselves, so metadata is fetched concurrently and
+        videos found in a playlist join the same queue.
+
+        Args:
+            on_result: Optional callback invoked with each finished ``DownloadResult``.
+
+        Returns:
+            Aggregate statistics for the run.
+        """
+        results: List[DownloadResult] = []
+        start = time.perf_counter()
+        threads = [
+            threading.Thread(target=self._worker, args=(results, on_result), daemon=True) for _ in range(self.workers)
+        ]
+        for thread in threads:
+            thread.start()
+        self._queue.join()
+        for _ in threads:
+            self._queue.put(None)
+        for thread in threads:
+            thread.join()
+
+        return DownloadStats(results=results, elapsed=time.perf_counter() - start)
+
+
+class _ResumeProbe(yt_dlp.postprocessor.PostProcessor):
+    """Record the output file and the size of any partial download just before yt-dlp starts downloading."""
+
+    def __init__(self, result: DownloadResult):
+        """Initialize"""
+        super().__init__()
+        self.result = result
+
+    def run(self, info: dict):
+        """Measure the existing ``.part`` file, which the download will resume from."""
+        filename = self._downloader.prepare_filename(info)
+        part = filename + ".part"
+        self.result.filename = filename
+        self.result.resumed_bytes = os.path.getsize(part) if os.path.exists(part) else 0
+        return [], info
+
+
+def download_videos(
+    urls: Iterable[str],
+    output_dir: str = "./",
+    workers: int = 4,
+    archive: Optional[str] = "downloads.txt",
+    format: str = "best",
+    audio_only: bool = False,
+) -> DownloadStats:
+    """Download videos concurrently and print a line per item plus a summary.
+
+    Args:
+        urls: Video or playlist URLs.
+        output_dir: Directory the files are saved to.
+        workers: Number of concurrent downloads.
+        archive: Download archive file (relative to ``output_dir``); None disables it.
+        format: yt-dlp format selector.
+        audio_only: If True, download the best audio stream only.
+
+    Returns:
+        Aggregate statistics for the run.
+    """
+    manager = DownloadManager(
+        output_dir=output_dir, workers=workers, archive=archive, format=format, audio_only=audio_only
+    )
+    job = current_job()
+    manager.extend(urls)
+
+    def report(result: DownloadResult) -> None:
+        job.count(result.status)
+        if result.status == "error":
+            job.warn(f"Error: {result.url}: {result.error}")
+        elif result.status == "skipped":
+            job.log(f"Skipped (archived): {result.title or result.url}")
+        else:
+            job.count("bytes", result.bytes - result.resumed_bytes)
+            job.log(f"Downloaded: {result.title} ({result.bytes / 1e6:.1f} MB, {result.speed / 1e6:.2f} MB/s)")
 
-download_youtube_video(video_url, output_directory)
+    with job.stage("fetch"):
+        stats = manager.run(on_result=report)
+    job.log(stats.summary())
+    return stats
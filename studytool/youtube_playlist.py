@@ -1,5 +1,7 @@
 import youtube_dl
 
+from .jobs import current_job
+
 
 def playlist_titles(url: str, number: int = 200) -> None:
     """Print YouTube playlist titles."""
@@ -11,8 +13,9 @@ def playlist_titles(url: str, number: int = 200) -> None:
         "playlistend": number,  # Set the number of videos to retrieve
     }
 
-    with youtube_dl.YoutubeDL(params=ydl_opts) as ydl:
+    job = current_job()
+    with job.stage("fetch"), youtube_dl.YoutubeDL(params=ydl_opts) as ydl:
         playlist_info = ydl.extract_info(url=url, download=False)
-        video_titles = [video["title"] for video in playlist_info["entries"]]
-        for title in video_titles:
-            print(title)
+    video_titles = [video["title"] for video in playlist_info["entries"]]
+    for title in video_titles:
+        job.log(title)